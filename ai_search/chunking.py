@@ -0,0 +1,94 @@
+"""
+문서 텍스트 청크 분할
+문단 / 문장 경계를 최대한 유지하면서 토큰 수 기준으로 청크를 만듭니다.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from models.token_counter import count_tokens, truncate_to_tokens
+
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+# 빈 줄(문단) 또는 문장 끝(. ? ! 。 다.) 뒤의 공백에서 분리
+_SEGMENT_PATTERN = re.compile(r"\n\s*\n|(?<=[.!?。])\s+")
+
+
+def _split_segments(text: str, max_tokens: int, model_name: Optional[str]) -> List[tuple]:
+    """텍스트를 (segment, token 수) 목록으로 분리 (max_tokens 보다 긴 segment 는 강제로 자름)"""
+    segments = []
+    for segment in _SEGMENT_PATTERN.split(text):
+        segment = " ".join(segment.split())
+        if not segment:
+            continue
+        tokens = count_tokens(segment, model_name)
+        while tokens > max_tokens:
+            head = truncate_to_tokens(segment, max_tokens, model_name, suffix="")
+            if not head:
+                break
+            segments.append((head, count_tokens(head, model_name)))
+            segment = segment[len(head):].strip()
+            tokens = count_tokens(segment, model_name)
+        if segment:
+            segments.append((segment, tokens))
+    return segments
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    model_name: Optional[str] = None,
+) -> List[str]:
+    """max_tokens 이하의 청크 목록 (이전 청크 끝의 segment 를 overlap_tokens 만큼 다음 청크 앞에 포함)"""
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    chunks: List[str] = []
+    current: List[tuple] = []
+    current_tokens = 0
+
+    for segment, tokens in _split_segments(text or "", max_tokens, model_name):
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(s for s, _ in current))
+            # 끝에서부터 overlap_tokens 이내의 segment 를 다음 청크로 이월
+            carried: List[tuple] = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                if carried_tokens + previous[1] > overlap_tokens or carried_tokens + previous[1] + tokens > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+            current, current_tokens = carried, carried_tokens
+        current.append((segment, tokens))
+        current_tokens += tokens
+
+    if current:
+        chunks.append(" ".join(s for s, _ in current))
+    return chunks
+
+
+def chunk_document(
+    document_name: str,
+    pages: List[str],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    model_name: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """페이지별 텍스트를 청크로 나누고 출처 정보를 붙여 반환
+
+    Returns:
+        List[Dict[str, Any]]: chunk_id, document, page(1부터), content
+    """
+    chunks = []
+    for page_number, page_text in enumerate(pages, start=1):
+        for content in chunk_text(page_text, max_tokens, overlap_tokens, model_name):
+            chunks.append({
+                "chunk_id": f"{document_name}#{len(chunks)}",
+                "document": document_name,
+                "page": page_number,
+                "content": content,
+            })
+    return chunks
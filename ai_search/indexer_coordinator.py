@@ -0,0 +1,264 @@
+"""
+Azure AI Search Indexer 실행 조정 클래스
+여러 사용자 / 수집 작업의 인덱서 실행 요청을 하나로 모으고, 상태를 백그라운드에서 조회해 공유합니다.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ai_search.indexer_manager import IndexerManager
+
+
+# 이 시간(초) 안에 들어온 실행 요청은 한 번의 실행으로 합침
+INDEXER_TRIGGER_DEBOUNCE = float(os.getenv("INDEXER_TRIGGER_DEBOUNCE", "5"))
+# 실행 중 상태 조회 간격 (지수 백오프: min → max)
+INDEXER_POLL_MIN_INTERVAL = float(os.getenv("INDEXER_POLL_MIN_INTERVAL", "2"))
+INDEXER_POLL_MAX_INTERVAL = float(os.getenv("INDEXER_POLL_MAX_INTERVAL", "60"))
+# 캐시된 상태를 그대로 사용할 수 있는 시간(초)
+INDEXER_STATUS_TTL = float(os.getenv("INDEXER_STATUS_TTL", "30"))
+# 실행 요청 후 이 시간(초)이 지나도 새 실행 기록이 보이지 않으면 완료된 것으로 간주
+INDEXER_RUN_TIMEOUT = float(os.getenv("INDEXER_RUN_TIMEOUT", "1800"))
+
+RUNNING_STATUSES = ("inProgress",)
+
+
+def _last_result(status_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return (status_data or {}).get("lastResult") or {}
+
+
+class IndexerCoordinator:
+    """
+    인덱서 실행 조정기
+    - debounce: 짧은 시간에 들어온 실행 요청을 한 번으로 합침
+    - 실행 중이면 새 실행을 보내지 않고 대기(queued)시켰다가 현재 실행이 끝나면 한 번 더 실행
+    - 실행 중에는 지수 백오프로 상태를 조회하고, 마지막 상태를 모든 세션이 공유
+    - 실행 완료 시 등록된 listener 에 이벤트 전달
+    """
+
+    def __init__(
+        self,
+        manager_factory: Callable[[], IndexerManager] = IndexerManager,
+        debounce_seconds: float = INDEXER_TRIGGER_DEBOUNCE,
+        poll_min_interval: float = INDEXER_POLL_MIN_INTERVAL,
+        poll_max_interval: float = INDEXER_POLL_MAX_INTERVAL,
+        status_ttl: float = INDEXER_STATUS_TTL,
+    ):
+        self.manager_factory = manager_factory
+        self.debounce_seconds = debounce_seconds
+        self.poll_min_interval = poll_min_interval
+        self.poll_max_interval = max(poll_min_interval, poll_max_interval)
+        self.status_ttl = status_ttl
+
+        self._manager: Optional[IndexerManager] = None
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._poller: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+        self._running = False
+        self._pending = False
+        self._coalesced = 0
+        self._last_status: Optional[Dict[str, Any]] = None
+        self._last_checked_at: Optional[float] = None
+        self._last_run_result: Optional[Dict[str, Any]] = None
+        # 실행 요청 직후에는 status 가 아직 이전 실행 결과를 보여줄 수 있으므로, 요청 전 lastResult.startTime 을 기억
+        self._previous_start_time: Optional[str] = None
+        self._run_requested_at: Optional[float] = None
+        self._stats: Dict[str, int] = {"requests": 0, "coalesced": 0, "queued": 0, "runs": 0, "status_calls": 0}
+
+    def _get_manager(self) -> IndexerManager:
+        if self._manager is None:
+            self._manager = self.manager_factory()
+        return self._manager
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """실행 완료 이벤트({"type": "run_completed", "status", "items_processed", "items_failed", "end_time"}) 수신"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def request_run(self) -> Dict[str, Any]:
+        """인덱서 실행 요청 (즉시 반환)
+
+        Returns:
+            Dict[str, Any]: success, state(scheduled / coalesced / queued), message
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            if self._running:
+                self._pending = True
+                self._stats["queued"] += 1
+                return {"success": True, "state": "queued", "message": "인덱서가 실행 중이라 현재 실행이 끝난 뒤 다시 실행합니다."}
+            if self._timer is not None:
+                self._coalesced += 1
+                self._stats["coalesced"] += 1
+                return {"success": True, "state": "coalesced", "message": "이미 예약된 인덱서 실행에 합쳐졌습니다."}
+
+            self._timer = threading.Timer(self.debounce_seconds, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+            return {"success": True, "state": "scheduled", "message": f"{self.debounce_seconds:.0f}초 후 인덱서 실행을 요청합니다."}
+
+    def _fire(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._coalesced = 0
+
+        try:
+            manager = self._get_manager()
+            # 다른 프로세스 / 포털에서 이미 실행 중이면 새로 실행하지 않고 대기
+            self._refresh_status(manager)
+            if _last_result(self._last_status).get("status") in RUNNING_STATUSES:
+                with self._lock:
+                    self._running = True
+                    self._pending = True
+                self._start_poller()
+                return
+
+            with self._lock:
+                self._previous_start_time = _last_result(self._last_status).get("startTime")
+                self._run_requested_at = time.time()
+            result = manager.run_indexer()
+        except Exception as e:
+            result = {"success": False, "status_code": None, "message": f"인덱서 실행 중 오류: {e}"}
+
+        with self._lock:
+            self._last_run_result = {**result, "requested_at": time.time()}
+            if result.get("success"):
+                self._stats["runs"] += 1
+                self._running = True
+            elif result.get("status_code") == 409:
+                # 이미 실행 중 (Conflict): 끝난 뒤 다시 실행
+                self._running = True
+                self._pending = True
+        if self._running:
+            self._start_poller()
+
+    def _refresh_status(self, manager: Optional[IndexerManager] = None) -> Dict[str, Any]:
+        result = (manager or self._get_manager()).get_indexer_status()
+        with self._lock:
+            self._stats["status_calls"] += 1
+            if result.get("success"):
+                self._last_status = result.get("data")
+                self._last_checked_at = time.time()
+        return result
+
+    def _start_poller(self) -> None:
+        with self._lock:
+            if self._poller is not None and self._poller.is_alive():
+                self._wake.set()
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name="indexer-status-poller", daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self) -> None:
+        interval = self.poll_min_interval
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                result = self._refresh_status()
+            except Exception as e:
+                print(f"인덱서 상태 조회 실패: {e}")
+                result = {"success": False}
+
+            last_result = _last_result(self._last_status)
+            if not result.get("success") or last_result.get("status") in RUNNING_STATUSES or self._is_stale_result(last_result):
+                interval = min(interval * 2, self.poll_max_interval)
+                continue
+
+            # 실행 완료
+            event = {
+                "type": "run_completed",
+                "status": last_result.get("status"),
+                "items_processed": last_result.get("itemsProcessed"),
+                "items_failed": last_result.get("itemsFailed"),
+                "end_time": last_result.get("endTime"),
+            }
+            with self._lock:
+                self._running = False
+                self._run_requested_at = None
+                run_again = self._pending
+                self._pending = False
+                listeners = list(self._listeners)
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"인덱서 이벤트 처리 실패: {e}")
+
+            if run_again:
+                self._fire()
+            with self._lock:
+                if not self._running:
+                    self._poller = None
+                    return
+            interval = self.poll_min_interval
+
+    def _is_stale_result(self, last_result: Dict[str, Any]) -> bool:
+        """lastResult 가 아직 이번 실행 이전의 기록인지 여부
+
+        한 번도 실행된 적 없는 인덱서는 startTime 이 없으므로, 실행 기록이 생길 때까지 이전 기록으로 간주한다.
+        """
+        with self._lock:
+            if self._run_requested_at is None or time.time() - self._run_requested_at > INDEXER_RUN_TIMEOUT:
+                return False
+            start_time = last_result.get("startTime")
+            return start_time is None or start_time == self._previous_start_time
+
+    def get_status(self, refresh_if_stale: bool = False) -> Dict[str, Any]:
+        """캐시된 인덱서 상태 (refresh_if_stale=True 이고 TTL 이 지났으면 한 번 조회)
+
+        Returns:
+            Dict[str, Any]: success, state(idle / scheduled / running), pending, data, last_checked_at, last_run_result, message
+        """
+        message = ""
+        if refresh_if_stale and (self._last_checked_at is None or time.time() - self._last_checked_at > self.status_ttl):
+            try:
+                result = self._refresh_status()
+                message = result.get("message", "")
+            except Exception as e:
+                message = f"인덱서 상태 조회 중 오류: {e}"
+
+        with self._lock:
+            if self._running:
+                state = "running"
+            elif self._timer is not None:
+                state = "scheduled"
+            else:
+                state = "idle"
+            return {
+                "success": self._last_status is not None,
+                "state": state,
+                "pending": self._pending,
+                "coalesced": self._coalesced,
+                "data": self._last_status,
+                "last_checked_at": self._last_checked_at,
+                "last_run_result": self._last_run_result,
+                "message": message or ("인덱서 상태 조회 성공" if self._last_status is not None else "인덱서 상태를 아직 조회하지 못했습니다."),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+
+_indexer_coordinator: Optional[IndexerCoordinator] = None
+_indexer_coordinator_lock = threading.Lock()
+
+
+def get_indexer_coordinator() -> IndexerCoordinator:
+    """프로세스 전역 IndexerCoordinator (모든 세션이 실행 요청과 상태 캐시를 공유)"""
+    global _indexer_coordinator
+    with _indexer_coordinator_lock:
+        if _indexer_coordinator is None:
+            _indexer_coordinator = IndexerCoordinator()
+        return _indexer_coordinator
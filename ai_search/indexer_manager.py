@@ -4,12 +4,86 @@ Azure AI Search Indexer 관리 클래스
 """
 
 import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+INDEXER_HTTP_POOL_SIZE = int(os.getenv("INDEXER_HTTP_POOL_SIZE", "10"))
+INDEXER_HTTP_TIMEOUT = float(os.getenv("INDEXER_HTTP_TIMEOUT", "20"))
+INDEXER_HTTP_MAX_RETRIES = int(os.getenv("INDEXER_HTTP_MAX_RETRIES", "3"))
+INDEXER_HTTP_BACKOFF_BASE = float(os.getenv("INDEXER_HTTP_BACKOFF_BASE", "0.5"))
+INDEXER_HTTP_BACKOFF_MAX = float(os.getenv("INDEXER_HTTP_BACKOFF_MAX", "30"))
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# 모든 IndexerManager 가 공유하는 keep-alive 커넥션 풀
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# 작업(operation)별 지연 시간 지표
+_latency_metrics: Dict[str, Dict[str, float]] = {}
+_latency_metrics_lock = threading.Lock()
+
+
+def get_shared_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=INDEXER_HTTP_POOL_SIZE, pool_maxsize=INDEXER_HTTP_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _record_latency(operation: str, elapsed: float, retries: int, error: bool) -> None:
+    elapsed_ms = elapsed * 1000
+    with _latency_metrics_lock:
+        metric = _latency_metrics.setdefault(
+            operation, {"count": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+        )
+        metric["count"] += 1
+        metric["errors"] += int(error)
+        metric["retries"] += retries
+        metric["total_ms"] += elapsed_ms
+        metric["max_ms"] = max(metric["max_ms"], elapsed_ms)
+        metric["last_ms"] = elapsed_ms
+
+
+def get_latency_metrics() -> Dict[str, Dict[str, float]]:
+    """작업별 호출 수, 오류 수, 재시도 수, 평균/최대/마지막 지연 시간(ms)"""
+    with _latency_metrics_lock:
+        return {
+            operation: {**metric, "avg_ms": metric["total_ms"] / metric["count"] if metric["count"] else 0.0}
+            for operation, metric in _latency_metrics.items()
+        }
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    # retry-after-ms(밀리초) 또는 Retry-After(초 단위 숫자 / HTTP 날짜)
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
 
 class IndexerManager:
     """Azure AI Search Indexer를 관리하는 클래스"""
@@ -22,6 +96,44 @@ class IndexerManager:
         
         if not self.search_endpoint or not self.admin_key:
             raise ValueError("환경변수 AZURE_AI_SEARCH_ENDPOINT 또는 AZURE_AI_SEARCH_ADMIN_KEY가 설정되지 않았습니다.")
+
+        self.session = get_shared_session()
+        self.indexer_url = f"{self.search_endpoint}/indexers/{self.indexer_name}"
+        self.params = {"api-version": self.api_version}
+        self.headers = {"api-key": self.admin_key}
+        self.post_headers = {**self.headers, "Content-Type": "application/json"}
+
+    def _request(self, operation: str, method: str, url: str, headers: Dict[str, str]) -> requests.Response:
+        """공유 세션으로 요청하고, 429/5xx 및 연결 실패 시 jitter 가 적용된 지수 백오프로 재시도
+
+        Retry-After 헤더가 있으면 그 시간 이상 기다린 뒤 재시도한다.
+        """
+        start = time.perf_counter()
+        retries = 0
+        try:
+            while True:
+                try:
+                    response = self.session.request(method, url, headers=headers, params=self.params, timeout=INDEXER_HTTP_TIMEOUT)
+                except (requests.ConnectionError, requests.Timeout):
+                    # 관리 작업은 중복 실행돼도 안전하므로(실행 중 재실행은 409) 연결 실패도 재시도
+                    if retries >= INDEXER_HTTP_MAX_RETRIES:
+                        raise
+                    retry_after = None
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or retries >= INDEXER_HTTP_MAX_RETRIES:
+                        _record_latency(operation, time.perf_counter() - start, retries, response.status_code >= 400)
+                        return response
+                    retry_after = _retry_after_seconds(response)
+
+                backoff = random.uniform(0, min(INDEXER_HTTP_BACKOFF_MAX, INDEXER_HTTP_BACKOFF_BASE * (2 ** retries)))
+                time.sleep(max(backoff, retry_after or 0.0))
+                retries += 1
+        except Exception:
+            _record_latency(operation, time.perf_counter() - start, retries, True)
+            raise
+
+    def latency_metrics(self) -> Dict[str, Dict[str, float]]:
+        return get_latency_metrics()
     
     def run_indexer(self) -> Dict[str, Any]:
         """
@@ -30,16 +142,8 @@ class IndexerManager:
         Returns:
             Dict[str, Any]: 실행 결과
         """
-        url = f"{self.search_endpoint}/indexers/{self.indexer_name}/run"
-        params = {"api-version": self.api_version}
-        headers = {
-            "Content-Type": "application/json",
-            "Content-Length": "0",
-            "api-key": self.admin_key,
-        }
-        
         try:
-            response = requests.post(url, headers=headers, params=params, timeout=20)
+            response = self._request("run_indexer", "POST", f"{self.indexer_url}/run", self.post_headers)
             
             result = {
                 "success": response.status_code in (200, 202),
@@ -70,14 +174,8 @@ class IndexerManager:
         Returns:
             Dict[str, Any]: 인덱서 상태 정보
         """
-        url = f"{self.search_endpoint}/indexers/{self.indexer_name}/status"
-        params = {"api-version": self.api_version}
-        headers = {
-            "api-key": self.admin_key,
-        }
-        
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=20)
+            response = self._request("get_indexer_status", "GET", f"{self.indexer_url}/status", self.headers)
             
             result = {
                 "success": response.status_code == 200,
@@ -108,14 +206,8 @@ class IndexerManager:
         Returns:
             Dict[str, Any]: 인덱서 정보
         """
-        url = f"{self.search_endpoint}/indexers/{self.indexer_name}"
-        params = {"api-version": self.api_version}
-        headers = {
-            "api-key": self.admin_key,
-        }
-        
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=20)
+            response = self._request("get_indexer_info", "GET", self.indexer_url, self.headers)
             
             result = {
                 "success": response.status_code == 200,
@@ -146,15 +238,8 @@ class IndexerManager:
         Returns:
             Dict[str, Any]: 리셋 결과
         """
-        url = f"{self.search_endpoint}/indexers/{self.indexer_name}/reset"
-        params = {"api-version": self.api_version}
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": self.admin_key,
-        }
-        
         try:
-            response = requests.post(url, headers=headers, params=params, timeout=20)
+            response = self._request("reset_indexer", "POST", f"{self.indexer_url}/reset", self.post_headers)
             
             result = {
                 "success": response.status_code in (200, 204),
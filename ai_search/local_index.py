@@ -0,0 +1,391 @@
+"""
+로컬 검색 인덱스
+수집된 문서 청크를 프로세스 안에서 검색하는 빠른 검색 계층입니다.
+- 벡터: 디스크의 float32 행렬을 NumPy memmap 으로 열고, 배치 단위 cosine top-k 계산
+- 키워드: BM25 (hybrid_alpha 로 벡터 점수와 결합)
+- 임베딩: 교체 가능한 Embedder (기본값은 외부 호출이 없는 결정적 해싱 임베더)
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", os.path.join(PROJECT_ROOT, ".cache", "local_index"))
+LOCAL_INDEX_EMBEDDER = os.getenv("LOCAL_INDEX_EMBEDDER", "hashing")
+LOCAL_INDEX_HASHING_DIM = int(os.getenv("LOCAL_INDEX_HASHING_DIM", "512"))
+# 한 번에 점수를 계산하는 행 수 (메모리 사용량 = batch_rows * dim * 4 bytes)
+LOCAL_INDEX_SEARCH_BATCH_ROWS = int(os.getenv("LOCAL_INDEX_SEARCH_BATCH_ROWS", "65536"))
+LOCAL_INDEX_EMBED_BATCH_SIZE = int(os.getenv("LOCAL_INDEX_EMBED_BATCH_SIZE", "64"))
+# 0~1, 벡터 점수 비중 (1 이면 벡터만, 0 이면 BM25 만)
+LOCAL_INDEX_HYBRID_ALPHA = float(os.getenv("LOCAL_INDEX_HYBRID_ALPHA", "0.7"))
+# 채팅 페이지에서 로컬 검색 결과를 사용할 최소 점수 / 개수
+LOCAL_INDEX_MIN_SCORE = float(os.getenv("LOCAL_INDEX_MIN_SCORE", "0.2"))
+LOCAL_INDEX_TOP_K = int(os.getenv("LOCAL_INDEX_TOP_K", "5"))
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token.lower() for token in _TOKEN_PATTERN.findall(text or "")]
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    """단어 / 문자 3-gram 을 고정 차원으로 해싱하는 결정적 임베더 (외부 호출 없음, 테스트 / 오프라인용)"""
+
+    def __init__(self, dim: int = LOCAL_INDEX_HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = tokenize(text)
+        features = list(words)
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(max(1, len(padded) - 2)))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in Counter(self._features(text)).items():
+                # 프로세스마다 값이 달라지는 hash() 대신 blake2b 사용
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                sign = 1.0 if digest & 1 else -1.0
+                vectors[row, (digest >> 1) % self.dim] += sign * (1.0 + math.log(count))
+        return _normalize_rows(vectors)
+
+
+class AzureOpenAIEmbedder:
+    """Azure OpenAI embedding 배포를 사용하는 임베더"""
+
+    def __init__(self, deployment: Optional[str] = None, client=None, batch_size: int = LOCAL_INDEX_EMBED_BATCH_SIZE):
+        self.deployment = deployment or os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-small")
+        self.name = f"azure-openai-{self.deployment}"
+        self.batch_size = batch_size
+        self._client = client
+        self.dim: Optional[int] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from models.azure_openai_model import AzureOpenAIModel
+            self._client = AzureOpenAIModel().client
+        return self._client
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(model=self.deployment, input=texts[start:start + self.batch_size])
+            vectors.extend(item.embedding for item in response.data)
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+        self.dim = matrix.shape[1]
+        return _normalize_rows(matrix)
+
+
+def get_embedder(name: str = LOCAL_INDEX_EMBEDDER):
+    if name == "hashing":
+        return HashingEmbedder()
+    elif name == "azure_openai":
+        return AzureOpenAIEmbedder()
+    else:
+        raise ValueError(f"Invalid embedder: {name}")
+
+
+class BM25:
+    """청크 토큰 기반 BM25 (역색인은 메모리에 유지)"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def add(self, row: int, text: str) -> None:
+        tokens = tokenize(text)
+        for token, count in Counter(tokens).items():
+            self.postings[token][row] = count
+        self.lengths[row] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, row: int, text: str) -> None:
+        for token in set(tokenize(text)):
+            self.postings.get(token, {}).pop(row, None)
+        self.total_length -= self.lengths.pop(row, 0)
+
+    def scores(self, query: str, size: int) -> np.ndarray:
+        scores = np.zeros(size, dtype=np.float32)
+        document_count = len(self.lengths)
+        if not document_count:
+            return scores
+        average_length = self.total_length / document_count or 1.0
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, count in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[row] / average_length)
+                scores[row] += idf * count * (self.k1 + 1) / (count + norm)
+        return scores
+
+
+class LocalVectorIndex:
+    """
+    memmap 벡터 행렬 + 청크 메타데이터(JSONL) 로 구성된 로컬 인덱스
+    - vectors.f32: 정규화된 float32 벡터 (행 = 청크)
+    - chunks.jsonl: 행 순서대로 청크 메타데이터
+    - meta.json: 임베더 이름, 차원, 삭제된 행
+    같은 문서를 다시 추가하면 이전 행은 삭제 표시되고, compact() 로 실제 공간을 회수합니다.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_PATH, embedder=None):
+        self.path = path
+        self.embedder = embedder or get_embedder()
+        self._lock = threading.RLock()
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._chunks_path = os.path.join(path, "chunks.jsonl")
+        self._meta_path = os.path.join(path, "meta.json")
+
+        self.dim: Optional[int] = getattr(self.embedder, "dim", None)
+        self._chunks: List[Dict[str, Any]] = []
+        self._deleted: set = set()
+        self._matrix: Optional[np.memmap] = None
+        self._bm25 = BM25()
+        self._load()
+
+    def _load(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # 메타데이터 없이 남은 벡터 / 청크 파일은 첫 추가가 끊긴 흔적이므로 정리
+            self.clear()
+            return
+        if meta.get("embedder") != self.embedder.name:
+            # 임베더가 바뀌면 기존 벡터와 비교할 수 없으므로 새로 만든다
+            print(f"로컬 인덱스 임베더 변경 ({meta.get('embedder')} → {self.embedder.name}), 인덱스를 초기화합니다.")
+            self.clear()
+            return
+
+        self.dim = meta["dim"]
+        self._deleted = set(meta.get("deleted", []))
+        self._chunks = []
+        if os.path.exists(self._chunks_path):
+            with open(self._chunks_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._chunks.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # 마지막 줄 쓰기가 끊긴 경우
+                        break
+        self._repair_files()
+        for row, chunk in enumerate(self._chunks):
+            if row not in self._deleted:
+                self._bm25.add(row, chunk["content"])
+        self._open_matrix()
+
+    def _repair_files(self) -> None:
+        """add_document 가 벡터 → 청크 순서로 쓰다 끊긴 경우 두 파일을 같은 행 수로 맞춤
+
+        남은 행이 있으면 다음 추가 시 새 청크가 다른 청크의 벡터와 짝지어지므로, 짧은 쪽 기준으로 자른다.
+        """
+        row_bytes = 4 * self.dim
+        vector_bytes = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        rows = min(vector_bytes // row_bytes, len(self._chunks))
+        if vector_bytes != rows * row_bytes:
+            with open(self._vectors_path, "r+b" if vector_bytes else "wb") as f:
+                f.truncate(rows * row_bytes)
+        chunk_lines = 0
+        if os.path.exists(self._chunks_path):
+            with open(self._chunks_path, "r", encoding="utf-8") as f:
+                chunk_lines = sum(1 for line in f if line.strip())
+        if len(self._chunks) > rows or chunk_lines != rows:
+            self._chunks = self._chunks[:rows]
+            tmp_path = f"{self._chunks_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for chunk in self._chunks:
+                    f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self._chunks_path)
+        deleted = {row for row in self._deleted if row < rows}
+        if deleted != self._deleted:
+            self._deleted = deleted
+            self._save_meta()
+
+    def _open_matrix(self) -> None:
+        rows = len(self._chunks)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else None
+
+    def _save_meta(self) -> None:
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"embedder": self.embedder.name, "dim": self.dim, "deleted": sorted(self._deleted)}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def __len__(self) -> int:
+        return len(self._chunks) - len(self._deleted)
+
+    def documents(self) -> List[str]:
+        with self._lock:
+            return sorted({chunk["document"] for row, chunk in enumerate(self._chunks) if row not in self._deleted})
+
+    def remove_document(self, document_name: str) -> int:
+        with self._lock:
+            removed = 0
+            for row, chunk in enumerate(self._chunks):
+                if chunk["document"] == document_name and row not in self._deleted:
+                    self._deleted.add(row)
+                    self._bm25.remove(row, chunk["content"])
+                    removed += 1
+            if removed:
+                self._save_meta()
+            return removed
+
+    def add_document(self, document_name: str, chunks: List[Dict[str, Any]]) -> int:
+        """문서의 청크를 임베딩해 추가 (같은 이름의 기존 청크는 대체)"""
+        texts = [chunk["content"] for chunk in chunks]
+        vectors = self.embedder.embed(texts) if texts else None
+
+        with self._lock:
+            self.remove_document(document_name)
+            if vectors is None:
+                return 0
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with open(self._chunks_path, "a", encoding="utf-8") as f:
+                for chunk in chunks:
+                    f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            start_row = len(self._chunks)
+            for offset, chunk in enumerate(chunks):
+                self._chunks.append(chunk)
+                self._bm25.add(start_row + offset, chunk["content"])
+            self._save_meta()
+            self._open_matrix()
+            return len(chunks)
+
+    def _vector_scores(self, query_vector: np.ndarray, matrix: np.memmap) -> np.ndarray:
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], LOCAL_INDEX_SEARCH_BATCH_ROWS):
+            end = start + LOCAL_INDEX_SEARCH_BATCH_ROWS
+            scores[start:end] = matrix[start:end] @ query_vector
+        return scores
+
+    def search(self, query: str, top_k: int = 5, hybrid_alpha: Optional[float] = LOCAL_INDEX_HYBRID_ALPHA) -> List[Dict[str, Any]]:
+        """query 와 가까운 청크 top_k 개 (hybrid_alpha=None 이면 벡터 점수만 사용)
+
+        Returns:
+            List[Dict[str, Any]]: title, filepath, chunk_id, page, content, score (Azure Search citation 과 같은 키)
+        """
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            matrix = self._matrix
+            chunks = self._chunks
+            deleted = list(self._deleted)
+            if matrix is None or not len(self):
+                return []
+            scores = self._vector_scores(query_vector, matrix)
+            if hybrid_alpha is not None and hybrid_alpha < 1.0:
+                bm25_scores = self._bm25.scores(query, len(chunks))
+                max_bm25 = float(bm25_scores.max()) if bm25_scores.size else 0.0
+                if max_bm25 > 0:
+                    scores = hybrid_alpha * scores + (1 - hybrid_alpha) * (bm25_scores / max_bm25)
+            if deleted:
+                scores[deleted] = -np.inf
+
+            top_k = min(top_k, len(self))
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+            ranked = candidates[np.argsort(-scores[candidates])]
+            return [
+                {
+                    "title": chunks[row]["document"],
+                    "filepath": chunks[row]["document"],
+                    "chunk_id": chunks[row]["chunk_id"],
+                    "page": chunks[row].get("page"),
+                    "content": chunks[row]["content"],
+                    "score": float(scores[row]),
+                }
+                for row in ranked
+            ]
+
+    def compact(self) -> None:
+        """삭제 표시된 행을 제거하고 벡터 / 메타데이터 파일을 다시 쓴다"""
+        with self._lock:
+            if not self._deleted or self._matrix is None:
+                return
+            keep = [row for row in range(len(self._chunks)) if row not in self._deleted]
+            vectors = np.array(self._matrix[keep], dtype=np.float32)
+            chunks = [self._chunks[row] for row in keep]
+            self._matrix = None
+            self._write_all(vectors, chunks)
+
+    def _write_all(self, vectors: np.ndarray, chunks: List[Dict[str, Any]]) -> None:
+        with open(f"{self._vectors_path}.tmp", "wb") as f:
+            f.write(vectors.tobytes())
+        with open(f"{self._chunks_path}.tmp", "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+        os.replace(f"{self._vectors_path}.tmp", self._vectors_path)
+        os.replace(f"{self._chunks_path}.tmp", self._chunks_path)
+        self._chunks = chunks
+        self._deleted = set()
+        self._bm25 = BM25()
+        for row, chunk in enumerate(chunks):
+            self._bm25.add(row, chunk["content"])
+        self._save_meta()
+        self._open_matrix()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self.dim = getattr(self.embedder, "dim", None)
+            for path in (self._vectors_path, self._chunks_path, self._meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._chunks = []
+            self._deleted = set()
+            self._bm25 = BM25()
+
+
+def format_context_prompt(citations: List[Dict[str, Any]]) -> str:
+    """검색된 청크를 [docN] 번호와 함께 system 프롬프트로 구성 (답변에서 [docN] 으로 인용하도록 안내)"""
+    lines = [
+        "다음은 질문과 관련해 검색된 문서 내용입니다. 이 내용을 근거로 답변하고, 근거로 사용한 문서는 [doc1] 처럼 번호로 인용하세요.",
+        "관련 내용이 없으면 문서에서 찾을 수 없다고 답변하세요.",
+    ]
+    for index, citation in enumerate(citations, start=1):
+        lines.append(f"\n[doc{index}] {citation.get('title') or ''}\n{citation.get('content', '')}")
+    return "\n".join(lines)
+
+
+_local_index: Optional[LocalVectorIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_index() -> LocalVectorIndex:
+    """프로세스 전역 LocalVectorIndex"""
+    global _local_index
+    with _local_index_lock:
+        if _local_index is None:
+            _local_index = LocalVectorIndex()
+        return _local_index
@@ -0,0 +1,119 @@
+"""
+검색(retrieval) 결과 캐시
+Azure OpenAI data_sources(azure_search) 응답의 context.citations 를 (인덱스 이름, 최근 사용자 질문들) 키로 저장하여
+같은 대화 흐름의 같은 / 거의 같은 질문은 검색 없이 미리 가져온 문서로 한 번에 답변할 수 있게 합니다.
+"자세히 설명해줘" 같은 후속 질문은 앞선 질문에 따라 검색 대상이 달라지므로 마지막 질문만으로는 키를 만들지 않습니다.
+인덱서 실행이 완료되면(IndexerCoordinator 이벤트) 캐시 전체를 무효화합니다.
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+# 캐시 hit 시 Azure On Your Data 의 대화 기반 질의 재작성(intent)을 거치지 않으므로 opt-in
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+# 캐시 키에 포함할 최근 사용자 질문 수 (마지막 질문 포함)
+RETRIEVAL_CACHE_CONTEXT_TURNS = int(os.getenv("RETRIEVAL_CACHE_CONTEXT_TURNS", "3"))
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "256"))
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_TRAILING_PUNCTUATION_PATTERN = re.compile(r"[\s?？!！.。,~]+$")
+
+
+def normalize_query(query: str) -> str:
+    """대소문자 / 전각·반각 / 공백 / 끝 문장부호 차이를 무시하도록 질문 정규화"""
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    query = _WHITESPACE_PATTERN.sub(" ", query).strip()
+    return _TRAILING_PUNCTUATION_PATTERN.sub("", query)
+
+
+def conversation_key(messages: List[Any], turns: int = RETRIEVAL_CACHE_CONTEXT_TURNS) -> tuple:
+    """최근 사용자 질문 turns 개를 정규화한 tuple (마지막 질문이 비어 있으면 빈 tuple)"""
+    questions = [
+        normalize_query(message.get("content") if isinstance(message.get("content"), str) else "")
+        for message in messages
+        if message and message.get("role") == "user"
+    ]
+    if not questions or not questions[-1]:
+        return ()
+    return tuple(questions[-max(1, turns):])
+
+
+class RetrievalCache:
+    """(index_name, 최근 사용자 질문들) → citations LRU 캐시 (TTL, thread-safe)"""
+
+    def __init__(self, ttl: float = RETRIEVAL_CACHE_TTL, max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, index_name: str, messages: List[Any]) -> Optional[List[Dict[str, Any]]]:
+        conversation = conversation_key(messages)
+        if not conversation:
+            return None
+        key = (index_name, conversation)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry["stored_at"] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry["citations"]
+
+    def set(self, index_name: str, messages: List[Any], citations: List[Dict[str, Any]]) -> None:
+        # 검색 결과가 없는 응답은 저장하지 않음 (다음 질문에서 다시 검색)
+        conversation = conversation_key(messages)
+        if not citations or not conversation:
+            return
+        key = (index_name, conversation)
+        with self._lock:
+            self._entries[key] = {"citations": citations, "stored_at": time.time()}
+            self._entries.move_to_end(key)
+            self._stats["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, index_name: Optional[str] = None) -> None:
+        with self._lock:
+            if index_name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == index_name]:
+                    del self._entries[key]
+            self._stats["invalidations"] += 1
+
+    def on_indexer_event(self, event: Dict[str, Any]) -> None:
+        """IndexerCoordinator listener: 인덱서 실행이 끝나면 인덱스 내용이 바뀌었으므로 전체 무효화"""
+        if event.get("type") == "run_completed":
+            self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+_retrieval_cache: Optional[RetrievalCache] = None
+_retrieval_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    """프로세스 전역 RetrievalCache (생성 시 인덱서 완료 이벤트에 무효화를 연결)"""
+    global _retrieval_cache
+    with _retrieval_cache_lock:
+        if _retrieval_cache is None:
+            _retrieval_cache = RetrievalCache()
+            from ai_search.indexer_coordinator import get_indexer_coordinator
+            get_indexer_coordinator().add_listener(_retrieval_cache.on_indexer_event)
+        return _retrieval_cache
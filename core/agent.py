@@ -6,9 +6,17 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Protocol, Union
+import asyncio
 import json
+import os
 import time
 
+from tools.event_loop import get_background_loop
+
+
+# run_batch 기본 동시 실행 수
+AGENT_BATCH_MAX_CONCURRENCY = int(os.getenv("AGENT_BATCH_MAX_CONCURRENCY", "8"))
+
 
 @dataclass
 class AgentConfig:
@@ -140,3 +148,78 @@ class AgentInterface(ABC):
         에러 처리. 필요시 서브클래스에서 override.
         """
         self.save_state("last_error", {"metadata": request.metadata, "error": response.error})
+
+
+class AzureOpenAIAgent(AgentInterface):
+    """
+    Azure OpenAI 에이전트 (models.model_selector.Model 을 통해 호출)
+    - run / arun: 단일 요청 (동기 / 비동기)
+    - run_batch / arun_batch: 여러 요청을 max_concurrency 이내로 동시에 실행하고 요청 순서대로 반환
+    - 429 대기 / 재시도는 모델 쪽 rate limiter(models.rate_limiter)가 담당
+    - config.extra: temperature, tools, extra_body, use_cache
+    """
+
+    def __init__(self, config: Optional[AgentConfig] = None, model_runner: Any = None, max_concurrency: int = AGENT_BATCH_MAX_CONCURRENCY):
+        super().__init__(config or AgentConfig(provider="azure", model=os.getenv("OPENAI_BASE_MODEL_NAME", "gpt-4")))
+        if model_runner is None:
+            from models.model_selector import model as model_runner
+            if model_runner.model_runner is None:
+                model_runner.init_model()
+        self.model_runner = model_runner
+        self.max_concurrency = max(1, max_concurrency)
+
+    def prepare_request(self, request: AgentRequest) -> Dict[str, Any]:
+        extra = self.config.extra
+        return {
+            "messages": request.messages,
+            "tools": extra.get("tools", []),
+            "temperature": extra.get("temperature", 0.4),
+            "extra_body": extra.get("extra_body", {}),
+            "use_cache": extra.get("use_cache"),
+        }
+
+    def send_request(self, payload: Dict[str, Any]) -> Any:
+        return self.model_runner.chat(**payload)
+
+    async def asend_request(self, payload: Dict[str, Any]) -> Any:
+        return await self.model_runner.achat(**payload)
+
+    def parse_response(self, raw_response: Any) -> AgentResponse:
+        if not raw_response.choices:
+            raise ValueError("응답에 choices 가 없습니다.")
+        usage = raw_response.usage.model_dump(exclude_none=True) if getattr(raw_response, "usage", None) else None
+        return AgentResponse(content=raw_response.choices[0].message.content or "", raw=raw_response, usage=usage)
+
+    async def arun(self, request: AgentRequest) -> AgentResponse:
+        """run 과 같은 흐름의 비동기 실행 (이벤트 루프 안에서 여러 요청을 동시에 처리)"""
+        start = time.time()
+        payload = self.prepare_request(request)
+        raw = None
+        try:
+            raw = await self.asend_request(payload)
+            resp = self.parse_response(raw)
+            resp.latency = time.time() - start
+            self._last_response = resp
+            self._on_success(request, resp)
+            return resp
+        except Exception as e:
+            resp = AgentResponse(content="", raw=raw, error=str(e), latency=time.time() - start)
+            self._last_response = resp
+            self._on_error(request, resp)
+            return resp
+
+    async def arun_batch(self, requests: List[AgentRequest], max_concurrency: Optional[int] = None) -> List[AgentResponse]:
+        """여러 요청을 동시에 실행 (max_concurrency 이내), 결과는 요청 순서대로 반환"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+
+        async def run_one(request: AgentRequest) -> AgentResponse:
+            async with semaphore:
+                return await self.arun(request)
+
+        return list(await asyncio.gather(*[run_one(request) for request in requests]))
+
+    def run_batch(self, requests: List[AgentRequest], max_concurrency: Optional[int] = None) -> List[AgentResponse]:
+        """동기 코드(Streamlit 스크립트 등)에서 배치 실행 (공용 백그라운드 이벤트 루프 사용)"""
+        if not requests:
+            return []
+        return get_background_loop().run(self.arun_batch(requests, max_concurrency))
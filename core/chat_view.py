@@ -0,0 +1,114 @@
+# Chat View 모듈
+# 채팅 페이지 공통 렌더링 헬퍼
+
+import itertools
+import json
+import os
+from typing import Any, Dict, List
+
+import streamlit as st
+from models.chat_stream import ChatStream
+
+
+# 화면에 펼쳐서 보여줄 최근 대화 턴 수 (이전 턴은 "이전 대화 더 보기" 로 불러옴)
+CHAT_HISTORY_VISIBLE_TURNS = int(os.getenv("CHAT_HISTORY_VISIBLE_TURNS", "10"))
+# Tool 결과 표시 최대 글자 수 (모델 요청 메시지는 그대로 유지)
+CHAT_HISTORY_TOOL_PREVIEW_CHARS = int(os.getenv("CHAT_HISTORY_TOOL_PREVIEW_CHARS", "4000"))
+
+
+def write_stream_message(stream: ChatStream, spinner_text: str = "GPT가 응답하는 중...") -> str:
+    """스트리밍 응답을 assistant 채팅 메시지로 렌더링하고 누적된 content 반환
+
+    첫 텍스트 delta 가 도착할 때까지는 spinner 를 표시하고,
+    텍스트 없이 tool_calls 만 있는 응답은 빈 말풍선을 만들지 않는다.
+    끝까지 읽지 못하고 중단돼도 stream 은 항상 close 된다.
+    """
+    try:
+        iterator = iter(stream)
+        with st.spinner(spinner_text):
+            first_delta = next(iterator, None)
+
+        if first_delta is not None:
+            with st.chat_message("assistant"):
+                st.write_stream(itertools.chain([first_delta], iterator))
+    finally:
+        # rerun / stop 으로 중간에 중단돼도 HTTP 응답과 rate limit 슬롯을 바로 반환
+        stream.close()
+    return stream.content
+
+
+def render_citations(citations: List[Dict[str, Any]]) -> None:
+    """core.citations 로 해석된 문서 단위 citation 목록 렌더링 (파싱 없이 저장된 결과만 표시)"""
+    if not citations:
+        return
+    with st.chat_message("assistant"):
+        with st.expander("🔗 참고한 문서/청크", expanded=False):
+            for document in citations:
+                markers = ", ".join(f"doc{number}" for number in document.get("doc_numbers", []))
+                for chunk in document.get("chunks", []):
+                    exp_title = f"Document - {document['filename']}" if chunk.get("chunk_id") is not None else f"미리보기 - {document['filename']}"
+                    with st.expander(f"{exp_title} [{markers}]" if markers else exp_title, expanded=False):
+                        st.text(chunk["content"].replace("\n", " "))
+
+
+def _render_message(message: Dict[str, Any]) -> None:
+    """확정된 기록 메시지 1개 렌더링 (system / tool_calls 요청 메시지는 표시하지 않음)"""
+    role = message.get("role")
+    if role == "system" or message.get("tool_calls"):
+        return
+    content = message.get("content")
+    if role == "tool":
+        body = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False, default=str)
+        if len(body) > CHAT_HISTORY_TOOL_PREVIEW_CHARS:
+            body = body[:CHAT_HISTORY_TOOL_PREVIEW_CHARS] + f"\n... ({len(body) - CHAT_HISTORY_TOOL_PREVIEW_CHARS}자 생략)"
+        with st.chat_message("assistant"):
+            with st.expander(f'Tool Calling: {message.get("name", "unknown")}', expanded=False):
+                st.write(body)
+        return
+    st.chat_message(role).markdown(content or "")
+    render_citations(message.get("citations"))
+
+
+class ChatHistoryView:
+    """
+    채팅 기록 렌더링 (최근 턴만 표시)
+    - 최근 visible_turns 개의 대화 턴만 렌더링하고, 이전 턴은 "이전 대화 더 보기" 를 누를 때까지 화면에 내보내지 않음
+    - 스트리밍 중인 응답은 write_stream_message 가 직접 렌더링하고, 기록에 추가된 뒤부터 여기서 렌더링
+    """
+
+    def __init__(self, state_key: str = "chat_history_view", visible_turns: int = CHAT_HISTORY_VISIBLE_TURNS):
+        self.state_key = state_key
+        self.page_size = max(1, visible_turns)
+        if state_key not in st.session_state:
+            st.session_state[state_key] = {"visible_turns": self.page_size}
+        self._state = st.session_state[state_key]
+
+    def reset(self) -> None:
+        self._state["visible_turns"] = self.page_size
+
+    def _show_more(self) -> None:
+        self._state["visible_turns"] += self.page_size
+
+    def render(self, messages: List[Dict[str, Any]]) -> None:
+        # user 메시지마다 새 턴 시작 (첫 user 메시지 이전의 system 메시지 등은 턴으로 세지 않음)
+        turns: List[List[Dict[str, Any]]] = []
+        for message in messages:
+            if not message:
+                continue
+            if message.get("role") == "user":
+                turns.append([])
+            if turns:
+                turns[-1].append(message)
+
+        hidden_turns = max(0, len(turns) - self._state["visible_turns"])
+        if hidden_turns:
+            st.button(
+                f"⬆️ 이전 대화 {hidden_turns}개 더 보기",
+                key=f"{self.state_key}_show_more",
+                on_click=self._show_more,
+                use_container_width=True,
+            )
+
+        for turn in turns[hidden_turns:]:
+            for message in turn:
+                _render_message(message)
@@ -0,0 +1,96 @@
+# Citation 후처리 모듈
+# RAG 응답 본문의 [docN] 마커를 한 번만 파싱해 data_sources context.citations 와 연결하고,
+# 같은 문서에서 나온 여러 청크는 하나로 묶는다.
+# 결과는 assistant 메시지의 "citations" 에 저장해 rerun 시에는 다시 파싱하지 않고 렌더링만 한다.
+
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+_MARKER_PATTERN = re.compile(r"\[doc(\d+)\]")
+# 스트리밍 중 delta 경계에서 잘린 마커를 기다릴 최대 길이 ("[doc" + 숫자 + "]")
+_MAX_PARTIAL_MARKER_LENGTH = 12
+
+
+class CitationParser:
+    """스트리밍 텍스트에서 [docN] 마커를 점진적으로 수집 (등장 순서 유지, 중복 제거)"""
+
+    def __init__(self):
+        self._pending = ""
+        self._markers: "OrderedDict[int, None]" = OrderedDict()
+
+    def _scan(self, text: str) -> None:
+        for match in _MARKER_PATTERN.finditer(text):
+            self._markers.setdefault(int(match.group(1)), None)
+
+    def feed(self, delta: str) -> None:
+        text = self._pending + (delta or "")
+        # 마지막 "[" 이후가 아직 닫히지 않았으면 다음 delta 와 이어서 검사
+        start = text.rfind("[")
+        if start != -1 and "]" not in text[start:] and len(text) - start < _MAX_PARTIAL_MARKER_LENGTH:
+            self._scan(text[:start])
+            self._pending = text[start:]
+        else:
+            self._scan(text)
+            self._pending = ""
+
+    def finish(self) -> None:
+        self._scan(self._pending)
+        self._pending = ""
+
+    @property
+    def markers(self) -> List[int]:
+        return list(self._markers)
+
+    def resolve(self, citations: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        self.finish()
+        return resolve_markers(self.markers, citations)
+
+
+def _document_key(citation: Dict[str, Any]) -> str:
+    return citation.get("filepath") or citation.get("url") or citation.get("title") or ""
+
+
+def resolve_markers(markers: List[int], citations: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """마커 번호(1부터)를 citation 과 연결하고 문서 단위로 묶음
+
+    마커가 없으면 전체 citation 을 사용한다.
+
+    Returns:
+        List[Dict[str, Any]]: title, filepath, url, filename, doc_numbers, chunks([{chunk_id, content}])
+    """
+    citations = citations or []
+    if markers:
+        selected = [(number, citations[number - 1]) for number in markers if 1 <= number <= len(citations)]
+    else:
+        selected = list(enumerate(citations, start=1))
+
+    documents: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    for number, citation in selected:
+        key = _document_key(citation) or f"doc{number}"
+        document = documents.get(key)
+        if document is None:
+            filepath = citation.get("filepath")
+            title = citation.get("title") or filepath or f"Citation {number}"
+            document = {
+                "title": title,
+                "filepath": filepath,
+                "url": citation.get("url"),
+                "filename": os.path.basename(filepath) if filepath else title,
+                "doc_numbers": [],
+                "chunks": [],
+            }
+            documents[key] = document
+        document["doc_numbers"].append(number)
+        if citation.get("content"):
+            document["chunks"].append({"chunk_id": citation.get("chunk_id"), "content": citation["content"]})
+    return list(documents.values())
+
+
+def resolve_citations(content: str, citations: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """완성된 응답 본문 기준으로 citation 해석 (스트리밍이 아닌 경우)"""
+    parser = CitationParser()
+    parser.feed(content)
+    return parser.resolve(citations)
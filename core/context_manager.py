@@ -0,0 +1,141 @@
+# Conversation Context 모듈
+# st.session_state.messages 전체를 매 요청마다 보내지 않도록,
+# 토큰 예산 안에서 모델에 전달할 메시지 목록을 구성한다.
+
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from models.token_counter import count_message_tokens, count_messages_tokens, truncate_to_tokens
+
+
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "12000"))
+CHAT_CONTEXT_TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_TOOL_OUTPUT_MAX_TOKENS", "400"))
+CHAT_CONTEXT_KEEP_RECENT_TURNS = int(os.getenv("CHAT_CONTEXT_KEEP_RECENT_TURNS", "2"))
+CHAT_CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_SUMMARY_MAX_TOKENS", "300"))
+
+# 모델 요청에 포함할 메시지 필드 (citations 등 화면 표시용 필드는 제외)
+MESSAGE_REQUEST_FIELDS = ("role", "content", "name", "tool_calls", "tool_call_id")
+
+
+def _as_dict(message: Any) -> Dict[str, Any]:
+    # ChatCompletionMessage 같은 객체가 섞여 있어도 dict 로 통일
+    if hasattr(message, "model_dump"):
+        message = message.model_dump(exclude_none=True)
+    return {key: value for key, value in dict(message).items() if key in MESSAGE_REQUEST_FIELDS}
+
+
+def _default_summarizer(turns: List[List[Dict[str, Any]]]) -> str:
+    """LLM 호출 없이 생략된 턴의 사용자 질문만 나열하는 요약"""
+    questions = [
+        str(message.get("content", "")).strip()
+        for turn in turns
+        for message in turn
+        if message.get("role") == "user" and message.get("content")
+    ]
+    if not questions:
+        return ""
+    return "이전 대화에서 사용자가 질문한 내용: " + " / ".join(questions)
+
+
+class ConversationContextManager:
+    """
+    토큰 예산 기반 대화 컨텍스트 구성기
+    - 동일한 system 프롬프트는 한 번만 포함 (추가 system 프롬프트는 세션 기록에 쌓지 않고 요청에만 포함)
+    - 예산 초과 시 1) 오래된 tool 출력 축약 2) 오래된 턴 제거 + 요약 3) 최근 턴 tool 출력 축약 순으로 줄임
+    - assistant(tool_calls) 와 대응하는 tool 메시지는 턴 단위로 함께 유지/제거되어 짝이 깨지지 않음
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CHAT_CONTEXT_TOKEN_BUDGET,
+        tool_output_max_tokens: int = CHAT_CONTEXT_TOOL_OUTPUT_MAX_TOKENS,
+        keep_recent_turns: int = CHAT_CONTEXT_KEEP_RECENT_TURNS,
+        summary_max_tokens: int = CHAT_CONTEXT_SUMMARY_MAX_TOKENS,
+        summarizer: Optional[Callable[[List[List[Dict[str, Any]]]], str]] = _default_summarizer,
+        model_name: Optional[str] = None,
+    ):
+        self.token_budget = token_budget
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.summary_max_tokens = summary_max_tokens
+        self.summarizer = summarizer
+        self.model_name = model_name
+        self.last_stats: Dict[str, int] = {}
+
+    def _split(self, messages: List[Any], extra_system_prompts: Optional[List[str]]) -> tuple:
+        system_messages: List[Dict[str, Any]] = []
+        seen_system = set()
+        turns: List[List[Dict[str, Any]]] = []
+
+        for message in messages:
+            if not message:
+                continue
+            message = _as_dict(message)
+            if message.get("role") == "system":
+                content = message.get("content") or ""
+                if content not in seen_system:
+                    seen_system.add(content)
+                    system_messages.append(message)
+                continue
+            # user 메시지마다 새 턴 시작 (assistant/tool 메시지는 직전 턴에 포함)
+            if message.get("role") == "user" or not turns:
+                turns.append([])
+            turns[-1].append(message)
+
+        for prompt in extra_system_prompts or []:
+            if prompt and prompt not in seen_system:
+                seen_system.add(prompt)
+                system_messages.append({"role": "system", "content": prompt})
+
+        return system_messages, turns
+
+    def _truncate_tool_outputs(self, turns: List[List[Dict[str, Any]]]) -> None:
+        for turn in turns:
+            for message in turn:
+                if message.get("role") == "tool" and isinstance(message.get("content"), str):
+                    message["content"] = truncate_to_tokens(message["content"], self.tool_output_max_tokens, self.model_name)
+
+    def _turn_tokens(self, turn: List[Dict[str, Any]]) -> int:
+        return sum(count_message_tokens(message, self.model_name) for message in turn)
+
+    def prepare(self, messages: List[Any], extra_system_prompts: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """모델 요청용 메시지 목록 생성 (원본 messages 는 변경하지 않음)"""
+        system_messages, turns = self._split(messages, extra_system_prompts)
+        # 턴별 토큰 수는 한 번만 계산하고, 축약/제거 시 합계만 갱신
+        system_tokens = count_messages_tokens(system_messages, self.model_name)
+        turn_tokens = [self._turn_tokens(turn) for turn in turns]
+        original_tokens = system_tokens + sum(turn_tokens)
+        dropped_turns: List[List[Dict[str, Any]]] = []
+
+        if original_tokens > self.token_budget:
+            # 1) 최근 턴을 제외한 오래된 tool 출력 축약
+            old_turn_count = max(0, len(turns) - self.keep_recent_turns)
+            self._truncate_tool_outputs(turns[:old_turn_count])
+            for index in range(old_turn_count):
+                turn_tokens[index] = self._turn_tokens(turns[index])
+
+            # 2) 가장 오래된 턴부터 제거 (마지막 턴은 항상 유지)
+            summary_tokens = self.summary_max_tokens if self.summarizer else 0
+            total_tokens = system_tokens + sum(turn_tokens)
+            while len(turns) > 1 and total_tokens + summary_tokens > self.token_budget:
+                dropped_turns.append(turns.pop(0))
+                total_tokens -= turn_tokens.pop(0)
+
+            # 3) 그래도 초과하면 남은 턴의 tool 출력까지 축약
+            if total_tokens > self.token_budget:
+                self._truncate_tool_outputs(turns)
+
+        if dropped_turns and self.summarizer:
+            summary = self.summarizer(dropped_turns)
+            if summary:
+                summary = truncate_to_tokens(summary, self.summary_max_tokens, self.model_name)
+                system_messages.append({"role": "system", "content": f"[이전 대화 요약]\n{summary}"})
+
+        prepared = system_messages + [message for turn in turns for message in turn]
+        self.last_stats = {
+            "original_tokens": original_tokens,
+            "prepared_tokens": count_messages_tokens(prepared, self.model_name),
+            "dropped_turns": len(dropped_turns),
+            "messages": len(prepared),
+        }
+        return prepared
@@ -0,0 +1,153 @@
+# 문서 텍스트 추출 모듈
+# 미리보기 / 수집 파이프라인에서 PDF 를 매번 새로 파싱하지 않도록
+# 내용 해시(sha256) 별로 PdfReader 와 페이지별 추출 결과를 메모리에 보관하고,
+# 필요한 페이지만 요청 시점에 추출한다.
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import PyPDF2
+
+
+DOC_EXTRACTION_CACHE_MAX_DOCUMENTS = int(os.getenv("DOC_EXTRACTION_CACHE_MAX_DOCUMENTS", "16"))
+DOC_EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("DOC_EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_PAGE_SIZE = 5
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class PdfDocument:
+    """하나의 PDF 에 대한 PdfReader 와 페이지별 추출 텍스트 (추출은 페이지 단위로 지연 수행)"""
+
+    def __init__(self, digest: str, data: bytes):
+        self.digest = digest
+        self.size = len(data)
+        self.reader = PyPDF2.PdfReader(io.BytesIO(data))
+        self.page_count = len(self.reader.pages)
+        self._pages: Dict[int, str] = {}
+        # PdfReader 는 thread-safe 하지 않으므로 문서별 lock
+        self._lock = threading.Lock()
+
+    def page_text(self, page_index: int) -> str:
+        with self._lock:
+            text = self._pages.get(page_index)
+            if text is None:
+                text = self.reader.pages[page_index].extract_text() or ""
+                self._pages[page_index] = text
+                self.size += len(text.encode("utf-8"))
+            return text
+
+    @property
+    def extracted_pages(self) -> int:
+        return len(self._pages)
+
+
+class DocumentExtractor:
+    """내용 해시별 PdfDocument LRU 캐시 (문서 수 / 원본+추출 텍스트 바이트 기준 제거)"""
+
+    def __init__(
+        self,
+        max_documents: int = DOC_EXTRACTION_CACHE_MAX_DOCUMENTS,
+        max_bytes: int = DOC_EXTRACTION_CACHE_MAX_BYTES,
+    ):
+        self.max_documents = max(1, max_documents)
+        self.max_bytes = max_bytes
+        self._documents: "OrderedDict[str, PdfDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "pages_extracted": 0}
+
+    def _evict(self) -> None:
+        total_bytes = sum(document.size for document in self._documents.values())
+        while len(self._documents) > 1 and (len(self._documents) > self.max_documents or total_bytes > self.max_bytes):
+            _, document = self._documents.popitem(last=False)
+            total_bytes -= document.size
+            self._stats["evictions"] += 1
+
+    def open_pdf(self, data: bytes, digest: Optional[str] = None) -> PdfDocument:
+        """같은 내용의 PDF 는 한 번만 파싱하고 이후에는 캐시된 PdfDocument 반환"""
+        digest = digest or content_digest(data)
+        with self._lock:
+            document = self._documents.get(digest)
+            if document is not None:
+                self._documents.move_to_end(digest)
+                self._stats["hits"] += 1
+                return document
+            self._stats["misses"] += 1
+
+        # 파싱은 lock 밖에서 수행 (동시에 같은 문서를 열면 먼저 등록된 쪽을 사용)
+        document = PdfDocument(digest, data)
+        with self._lock:
+            document = self._documents.setdefault(digest, document)
+            self._documents.move_to_end(digest)
+            self._evict()
+        return document
+
+    def get_pdf_pages(
+        self,
+        data: bytes,
+        start: int = 0,
+        count: int = DEFAULT_PAGE_SIZE,
+        digest: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """start 페이지(0부터)부터 count 페이지의 텍스트 추출 (이미 추출한 페이지는 재사용)
+
+        Returns:
+            Dict[str, Any]: digest, page_count, pages([{page(1부터), text}])
+        """
+        document = self.open_pdf(data, digest)
+        start = max(0, start)
+        end = min(document.page_count, start + max(0, count))
+
+        extracted_before = document.extracted_pages
+        pages = [{"page": index + 1, "text": document.page_text(index)} for index in range(start, end)]
+        with self._lock:
+            self._stats["pages_extracted"] += document.extracted_pages - extracted_before
+            self._evict()
+
+        return {
+            "digest": document.digest,
+            "page_count": document.page_count,
+            "pages": pages,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "documents": len(self._documents),
+                "bytes": sum(document.size for document in self._documents.values()),
+            }
+
+
+def extract_document_text(file_name: str, data: bytes) -> List[str]:
+    """파일 형식에 맞게 텍스트 추출 (PDF 는 페이지별, 텍스트/마크다운은 한 덩어리)
+
+    수집 파이프라인의 프로세스 풀에서 호출되므로 캐시를 사용하지 않는 최상위 함수로 둔다.
+    지원하지 않는 형식은 빈 목록 반환.
+    """
+    lower_name = file_name.lower()
+    if lower_name.endswith(".pdf"):
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        return [page.extract_text() or "" for page in reader.pages]
+    if lower_name.endswith((".txt", ".md")):
+        return [data.decode("utf-8", errors="replace")]
+    return []
+
+
+_document_extractor: Optional[DocumentExtractor] = None
+_document_extractor_lock = threading.Lock()
+
+
+def get_document_extractor() -> DocumentExtractor:
+    """프로세스 전역 DocumentExtractor (Streamlit rerun / 세션 간 공유)"""
+    global _document_extractor
+    with _document_extractor_lock:
+        if _document_extractor is None:
+            _document_extractor = DocumentExtractor()
+        return _document_extractor
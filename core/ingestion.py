@@ -0,0 +1,276 @@
+# 문서 수집(ingestion) 파이프라인
+# 업로드 → 텍스트 추출 → 청크 분할(+ 로컬 인덱스 추가) → 인덱서 실행 을 Streamlit 스크립트 스레드 밖에서 수행한다.
+# - 작업 대기열은 크기 제한(INGESTION_QUEUE_SIZE)이 있어 가득 차면 submit 이 즉시 실패
+# - CPU 를 쓰는 PDF 파싱은 프로세스 풀에서 병렬로 수행 (GIL 회피)
+# - 작업 상태는 job_id 로 조회(polling)
+
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ai_search.chunking import chunk_document
+from ai_search.local_index import LOCAL_INDEX_ENABLED, get_local_index
+from core.document_extraction import extract_document_text
+from storage.storage import BaseStorage, get_storage
+
+
+INGESTION_QUEUE_SIZE = int(os.getenv("INGESTION_QUEUE_SIZE", "8"))
+INGESTION_PROCESS_WORKERS = int(os.getenv("INGESTION_PROCESS_WORKERS", str(os.cpu_count() or 2)))
+INGESTION_MAX_JOB_HISTORY = int(os.getenv("INGESTION_MAX_JOB_HISTORY", "50"))
+INGESTION_TRIGGER_INDEXER = os.getenv("INGESTION_TRIGGER_INDEXER", "true").lower() in ("1", "true", "yes")
+
+# 단계별 진행률 구간 (시작, 끝)
+STAGE_PROGRESS = {
+    "queued": (0.0, 0.0),
+    "uploading": (0.0, 0.5),
+    "extracting": (0.5, 0.8),
+    "chunking": (0.8, 0.9),
+    "indexing": (0.9, 1.0),
+    "completed": (1.0, 1.0),
+    "failed": (1.0, 1.0),
+}
+
+
+class _NamedBytesIO(io.BytesIO):
+    """storage.save_files 가 요구하는 name / type 속성을 가진 메모리 파일"""
+
+    def __init__(self, data: bytes, name: str, content_type: Optional[str] = None):
+        super().__init__(data)
+        self.name = name
+        self.type = content_type
+
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    files: List[Dict[str, Any]]
+    status: str = "queued"
+    stage_progress: float = 0.0
+    message: str = ""
+    # 파일별 결과 (job.files 와 같은 순서, 같은 이름의 파일이 여러 개여도 각각 유지)
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    indexer_result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def progress(self) -> float:
+        start, end = STAGE_PROGRESS.get(self.status, (0.0, 0.0))
+        return start + (end - start) * min(max(self.stage_progress, 0.0), 1.0)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "files": [f["name"] for f in self.files],
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "results": [dict(result) for result in self.results],
+            "indexer_result": self.indexer_result,
+            "error": self.error,
+            "done": self.done,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionPipeline:
+    """크기 제한 대기열 + 단일 작업 스레드 + 파싱용 프로세스 풀로 구성된 문서 수집 파이프라인"""
+
+    def __init__(
+        self,
+        storage: Optional[BaseStorage] = None,
+        queue_size: int = INGESTION_QUEUE_SIZE,
+        process_workers: int = INGESTION_PROCESS_WORKERS,
+        trigger_indexer: bool = INGESTION_TRIGGER_INDEXER,
+    ):
+        self.storage = storage or get_storage()
+        self.process_workers = max(1, process_workers)
+        self.trigger_indexer = trigger_indexer
+
+        self._queue: "queue.Queue[IngestionJob]" = queue.Queue(maxsize=max(1, queue_size))
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._worker: Optional[threading.Thread] = None
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="ingestion-worker", daemon=True)
+                self._worker.start()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Streamlit 은 여러 스레드를 사용하므로 fork 대신 spawn 으로 워커 프로세스 생성
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, files: List[Any]) -> str:
+        """업로드 파일(UploadedFile 등)을 복사해 대기열에 넣고 job_id 를 즉시 반환
+
+        Raises:
+            RuntimeError: 대기열이 가득 찬 경우
+        """
+        # Streamlit UploadedFile 은 rerun 이후 사라질 수 있으므로 내용을 복사해 둔다
+        snapshot = [
+            {"name": f.name, "type": getattr(f, "type", None), "data": f.getvalue()}
+            for f in files
+        ]
+        job = IngestionJob(job_id=uuid.uuid4().hex, files=snapshot)
+        job.results = [{"name": f["name"], "status": "queued"} for f in snapshot]
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise RuntimeError("수집 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.")
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._trim_history()
+        self._ensure_worker()
+        return job.job_id
+
+    def _trim_history(self) -> None:
+        finished = [job for job in self._jobs.values() if job.done]
+        overflow = len(self._jobs) - INGESTION_MAX_JOB_HISTORY
+        for job in sorted(finished, key=lambda j: j.created_at)[:max(0, overflow)]:
+            del self._jobs[job.job_id]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)]
+
+    def _update(self, job: IngestionJob, **changes: Any) -> None:
+        with self._lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+
+    def _update_file(self, job: IngestionJob, index: int, **changes: Any) -> None:
+        with self._lock:
+            job.results[index].update(changes)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._process(job)
+            except Exception as e:
+                print(f"수집 작업 실패 ({job.job_id}): {e}")
+                self._update(job, status="failed", error=str(e), message=f"수집 실패: {e}", finished_at=time.time())
+            finally:
+                # 복사해 둔 파일 내용은 더 이상 필요 없음
+                for f in job.files:
+                    f.pop("data", None)
+                self._queue.task_done()
+
+    def _process(self, job: IngestionJob) -> None:
+        self._update(job, status="uploading", stage_progress=0.0, message="파일 업로드 중...", started_at=time.time())
+
+        # 1) 업로드 (저장소 구현의 병렬 업로드 / 중복 생략 사용)
+        def _on_upload_progress(uploaded: int, total: int) -> None:
+            self._update(job, stage_progress=uploaded / total if total else 1.0)
+
+        upload_files = [_NamedBytesIO(f["data"], f["name"], f["type"]) for f in job.files]
+        upload_results = self.storage.save_files(upload_files, progress_callback=_on_upload_progress)
+        for index, result in enumerate(upload_results):
+            status = "failed" if result.get("error") else ("skipped" if result.get("skipped") else "uploaded")
+            self._update_file(job, index, status=status, upload=result)
+
+        # 다른 이름으로 이미 저장된 내용이거나 업로드에 실패한 파일은 이후 단계에서 제외
+        targets = [
+            index for index, result in enumerate(upload_results)
+            if not result.get("error") and not result.get("duplicate_of")
+        ]
+
+        # 2) 텍스트 추출 (프로세스 풀)
+        self._update(job, status="extracting", stage_progress=0.0, message="텍스트 추출 중...")
+        pages_by_index: Dict[int, List[str]] = {}
+        if targets:
+            executor = self._get_executor()
+            futures = {
+                executor.submit(extract_document_text, job.files[index]["name"], job.files[index]["data"]): index
+                for index in targets
+            }
+            for done_count, (future, index) in enumerate(futures.items(), start=1):
+                try:
+                    pages_by_index[index] = future.result()
+                    self._update_file(job, index, pages=len(pages_by_index[index]))
+                except Exception as e:
+                    self._update_file(job, index, status="failed", error=f"텍스트 추출 실패: {e}")
+                self._update(job, stage_progress=done_count / len(futures))
+
+        # 3) 청크 분할 + 로컬 인덱스 추가 (청크를 사용할 로컬 인덱스가 꺼져 있으면 생략)
+        if LOCAL_INDEX_ENABLED and pages_by_index:
+            self._update(job, status="chunking", stage_progress=0.0, message="청크 분할 중...")
+            for done_count, (index, pages) in enumerate(pages_by_index.items(), start=1):
+                name = job.files[index]["name"]
+                chunks = chunk_document(name, pages)
+                self._update_file(job, index, chunks=len(chunks))
+                if chunks:
+                    try:
+                        get_local_index().add_document(name, chunks)
+                    except Exception as e:
+                        print(f"로컬 인덱스 추가 실패 ({name}): {e}")
+                self._update(job, stage_progress=done_count / len(pages_by_index))
+
+        # 4) 인덱서 실행 (새로 업로드된 파일이 있을 때만)
+        uploaded_any = any(not result.get("error") and not result.get("skipped") for result in upload_results)
+        if self.trigger_indexer and uploaded_any:
+            self._update(job, status="indexing", stage_progress=0.0, message="Document Hub 업데이트 요청 중...")
+            try:
+                # 여러 수집 작업의 실행 요청은 coordinator 가 한 번으로 합침
+                from ai_search.indexer_coordinator import get_indexer_coordinator
+                indexer_result = get_indexer_coordinator().request_run()
+            except Exception as e:
+                indexer_result = {"success": False, "status_code": None, "message": f"인덱서 실행 중 오류: {e}"}
+            self._update(job, indexer_result=indexer_result)
+
+        failed = [result["name"] for result in job.results if result.get("status") == "failed"]
+        message = f"{len(job.files)}개 파일 수집 완료" if not failed else f"{len(failed)}개 파일 수집 실패: {', '.join(failed)}"
+        self._update(
+            job,
+            status="completed" if not failed else "failed",
+            stage_progress=1.0,
+            message=message,
+            finished_at=time.time(),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_ingestion_pipeline: Optional[IngestionPipeline] = None
+_ingestion_pipeline_lock = threading.Lock()
+
+
+def get_ingestion_pipeline() -> IngestionPipeline:
+    """프로세스 전역 IngestionPipeline (모든 세션이 같은 대기열과 프로세스 풀을 공유)"""
+    global _ingestion_pipeline
+    with _ingestion_pipeline_lock:
+        if _ingestion_pipeline is None:
+            _ingestion_pipeline = IngestionPipeline()
+        return _ingestion_pipeline
@@ -12,8 +12,19 @@ from azure.core.exceptions import HttpResponseError, ClientAuthenticationError,
 import streamlit as st
 from tools.mcp.mcp_service import build_mcp_client
 from tools.mcp.mcp_client import McpClient
+from tools.mcp.tool_catalog_cache import ToolCatalogCache, server_fingerprint
 from tools.current_time import GET_CURRENT_TIME
+from core.tool_dispatcher import ToolDispatcher, ToolCallResult
+from tools.event_loop import get_background_loop
+from tools.tool_result_cache import ToolResultCache
 import asyncio
+import threading
+import time
+
+MCP_DISCOVERY_TIMEOUT = float(os.getenv("MCP_DISCOVERY_TIMEOUT", "15"))
+# 도구 목록 조회에 실패한 서버(unavailable / stale_cache)를 다시 조회하는 최소 간격(초)
+MCP_REDISCOVERY_INTERVAL = float(os.getenv("MCP_REDISCOVERY_INTERVAL", "60"))
+_REDISCOVER_STATUSES = ("unavailable", "stale_cache")
 
 class ToolCallingManager:
     """Azure OpenAI Function Calling을 관리하는 클래스"""
@@ -25,49 +36,137 @@ class ToolCallingManager:
         self.tool_client_mapper:dict[str,Any] = {}
         self.server_client_mapper:dict[str,Any] = {}
         self.tool_list:list = []
+        self.server_status:dict[str,str] = {}
+        self.server_tools:dict[str,list] = {}
+        self._last_discovery = 0.0
+        self.tool_catalog_cache = ToolCatalogCache()
+        # 여러 Streamlit 세션이 공유하므로 도구 목록 갱신은 lock 으로 직렬화
+        self._lock = threading.RLock()
         self.available_tools = self._register_tools()
+        # MCP 세션 풀/디스패처는 이벤트 루프에 묶이므로 도구 서브시스템 공용 백그라운드 루프에서 실행
+        self._event_loop = get_background_loop()
+        # 한 턴의 여러 tool_calls 를 동시에 실행하는 디스패처
+        self.dispatcher = ToolDispatcher(executor=self.aexecute_tool_call)
+        # 도구 결과 캐시 (공유 매니저이므로 세션 간에도 재사용)
+        self.tool_result_cache = ToolResultCache()
         self.init_mcp_servers()    
 
 
+    def _run_async(self, coro):
+        """백그라운드 이벤트 루프에 코루틴을 제출하고 결과를 기다림 (asyncio.run 처럼 매번 루프를 만들지 않음)"""
+        return self._event_loop.run(coro)
+
+
     def init_mcp_servers(self):
+        with self._lock:
+            self._init_mcp_servers()
 
-        builtin_tools = [GET_CURRENT_TIME]
-        tavily_mcp_server_url = os.getenv("TAVILY_MCP_URL")
-        paper_search_mcp_server_url = os.getenv("PAPER_SEARCH_MCP_SERVER_URL")
+    def refresh_tools(self):
+        """도구 목록 캐시를 무시하고 MCP 서버에서 다시 조회"""
+        with self._lock:
+            self.tool_catalog_cache.invalidate()
+            for mcp_client in self.server_client_mapper.values():
+                self._run_async(mcp_client.close())
+            self._init_mcp_servers(force=True)
 
-        tavily_mcp_client = build_mcp_client("tavily", tavily_mcp_server_url)
-        paper_search_mcp_client = build_mcp_client("paper_search", paper_search_mcp_server_url)
-        
-        self.server_client_mapper = {
-            "tavily": tavily_mcp_client,
-            "paper_search": paper_search_mcp_client,
+    def _init_mcp_servers(self, force: bool = False):
+
+        builtin_tools = [GET_CURRENT_TIME]
+        mcp_server_urls = {
+            "tavily": os.getenv("TAVILY_MCP_URL"),
+            "paper_search": os.getenv("PAPER_SEARCH_MCP_SERVER_URL"),
         }
 
+        self.server_client_mapper = {}
+        for server_name, server_url in mcp_server_urls.items():
+            if not server_url:
+                print(f"[{server_name}] MCP 서버 URL이 설정되지 않아 건너뜁니다.")
+                self.server_status[server_name] = "not_configured"
+                continue
+            self.server_client_mapper[server_name] = build_mcp_client(server_name, server_url)
+
+        # Tool List 호출 (모든 서버 동시 조회, 캐시 우선)
+        if force or len(self.tool_list) <= 0:
+            self.server_tools = self._run_async(self._discover_mcp_tools(list(self.server_client_mapper.keys())))
+            self._last_discovery = time.monotonic()
+            self._build_tool_list(builtin_tools)
+
+    def _build_tool_list(self, builtin_tools: list):
         converted_mcp_tools = []
-        tavily_tools, paper_search_tools = [], []
-
-        # Tool List 호출
-        if len(self.tool_list) <= 0:
-            # tavily tool list 목록 조회
-            tavily_tools:ListToolsResult = asyncio.run(tavily_mcp_client.tool_list())
-            for tavily_tool in tavily_tools.tools:
-                converted_tool = self.convert_mcp_tool_to_openai(tavily_tool)
+        tool_client_mapper = {}
+        for server_name, converted_tools in self.server_tools.items():
+            mcp_client = self.server_client_mapper[server_name]
+            for converted_tool in converted_tools:
                 converted_mcp_tools.append(converted_tool)
-                self.tool_client_mapper[tavily_tool.name] = tavily_mcp_client
+                tool_client_mapper[converted_tool["function"]["name"]] = mcp_client
 
-            # paper search tool list 목록 조회
-            paper_search_tools:ListToolsResult = asyncio.run(paper_search_mcp_client.tool_list())
-            for paper_search_tool in paper_search_tools.tools:
-                converted_tool = self.convert_mcp_tool_to_openai(paper_search_tool)
-                converted_mcp_tools.append(converted_tool)
-                self.tool_client_mapper[paper_search_tool.name] = paper_search_mcp_client
+        # 다른 세션이 읽는 중일 수 있으므로 완성된 객체로 한 번에 교체
+        self.tool_client_mapper = tool_client_mapper
+        self.tool_list = builtin_tools + converted_mcp_tools
+
+    def _servers_to_rediscover(self) -> List[str]:
+        if time.monotonic() - self._last_discovery < MCP_REDISCOVERY_INTERVAL:
+            return []
+        return [name for name in self.server_client_mapper if self.server_status.get(name) in _REDISCOVER_STATUSES]
 
-            self.tool_list = builtin_tools + converted_mcp_tools
+    def get_tools(self) -> list:
+        """도구 목록 반환. 조회에 실패한 서버는 MCP_REDISCOVERY_INTERVAL 이 지난 뒤 다음 호출에서 다시 조회"""
+        if self._servers_to_rediscover():
+            with self._lock:
+                server_names = self._servers_to_rediscover()
+                if server_names:
+                    discovered = self._run_async(self._discover_mcp_tools(server_names))
+                    self._last_discovery = time.monotonic()
+                    self.server_tools = {**self.server_tools, **discovered}
+                    self._build_tool_list([GET_CURRENT_TIME])
+        return self.tool_list
+
+    async def _discover_mcp_tools(self, server_names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """주어진 MCP 서버들의 도구 목록을 동시에 조회"""
+        results = await asyncio.gather(*[self._discover_server_tools(name) for name in server_names])
+        return dict(zip(server_names, results))
+
+    async def _discover_server_tools(self, server_name: str) -> List[Dict[str, Any]]:
+        """단일 서버 도구 목록 조회. 캐시 → 네트워크 → 만료된 캐시 순으로 사용하고, 실패 시 빈 목록"""
+        mcp_client = self.server_client_mapper[server_name]
+        fingerprint = server_fingerprint(mcp_client)
+
+        cached_tools = self.tool_catalog_cache.get(server_name, fingerprint)
+        if cached_tools is not None:
+            self.server_status[server_name] = "cached"
+            return cached_tools
+
+        try:
+            tools_result:ListToolsResult = await asyncio.wait_for(mcp_client.tool_list(), timeout=MCP_DISCOVERY_TIMEOUT)
+            converted_tools = [self.convert_mcp_tool_to_openai(tool) for tool in tools_result.tools]
+            self.tool_catalog_cache.set(server_name, fingerprint, converted_tools)
+            self.server_status[server_name] = "ok"
+            return converted_tools
+        except Exception as e:
+            print(f"[{server_name}] MCP 도구 목록 조회 실패: {e!r}")
+            stale_tools = self.tool_catalog_cache.get(server_name, fingerprint, allow_stale=True)
+            if stale_tools is not None:
+                self.server_status[server_name] = "stale_cache"
+                return stale_tools
+            self.server_status[server_name] = "unavailable"
+            return []
+
+    def get_server_status(self) -> Dict[str, str]:
+        """서버별 도구 조회 상태 (ok | cached | stale_cache | unavailable | not_configured)"""
+        return dict(self.server_status)
         
 
     def get_mcp_client(self, tool_name: str) -> McpClient:
         return self.tool_client_mapper[tool_name]
 
+    def get_tool_cache_stats(self) -> Dict[str, Any]:
+        """도구 결과 캐시 통계"""
+        return self.tool_result_cache.stats()
+
+    def get_mcp_pool_stats(self) -> Dict[str, Any]:
+        """서버별 MCP 세션 풀 통계"""
+        return {name: client.pool_stats() for name, client in self.server_client_mapper.items()}
+
     def _register_tools(self) -> Dict[str, Any]:
         """사용 가능한 도구들을 등록"""
         return {
@@ -196,25 +295,38 @@ class ToolCallingManager:
     
     def execute_tool_call(self, tool_call, tool_name, tool_args) -> str:
         """단일 도구 호출을 실행"""
-        if tool_name == "get_current_time":
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
-            if function_name not in self.available_tools:
-                return json.dumps({"error": f"Unknown function: {function_name}"})
-            
-            tool_function = self.available_tools[function_name]["function"]
-            
-            try:
-                # 함수 실행
-                result = tool_function(**function_args)
-                return result
-            except Exception as e:
-                return json.dumps({"error": f"Function execution failed: {str(e)}"})
-        else:
-            mcp_client = self.get_mcp_client(tool_name)
-            tool_response = asyncio.run(mcp_client.async_streamablehttp_call_tool(tool_name, tool_args))
+        return self._run_async(self.aexecute_tool_call(tool_call, tool_name, tool_args))
+
+    def execute_tool_calls(self, tool_calls) -> List[ToolCallResult]:
+        """한 턴의 도구 호출들을 동시에 실행하고 tool_call 순서대로 결과 반환"""
+        return self._run_async(self.dispatcher.dispatch(tool_calls))
+
+    async def aexecute_tool_call(self, tool_call, tool_name, tool_args) -> Any:
+        """단일 도구 호출을 비동기로 실행 (도구별 TTL 결과 캐시 + 동일 요청 병합)"""
+        tool_response = await self.tool_result_cache.get_or_call(
+            tool_name, tool_args, lambda: self._acall_tool(tool_name, tool_args)
+        )
+        if tool_name in self.tool_client_mapper:
             return tool_response.content
+        return tool_response
+
+    async def _acall_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+        """MCP 도구 우선, 내장 도구는 스레드에서 실행"""
+        if tool_name in self.tool_client_mapper:
+            mcp_client = self.get_mcp_client(tool_name)
+            return await mcp_client.async_streamablehttp_call_tool(tool_name, tool_args)
+        return await asyncio.to_thread(self._execute_builtin_tool, tool_name, tool_args)
+
+    def _execute_builtin_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> str:
+        if tool_name not in self.available_tools:
+            return json.dumps({"error": f"Unknown function: {tool_name}"})
+
+        tool_function = self.available_tools[tool_name]["function"]
+        try:
+            # 함수 실행
+            return tool_function(**tool_args)
+        except Exception as e:
+            return json.dumps({"error": f"Function execution failed: {str(e)}"})
     
     def process_chat_with_tools(self, messages: List[Dict[str, str]], show_process: bool = True) -> str:
         """도구를 사용한 채팅 처리"""
@@ -238,22 +350,22 @@ class ToolCallingManager:
                 if show_process:
                     st.info(f"🔧 {len(response_message.tool_calls)}개의 도구를 호출합니다...")
                 
-                for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    # Tool 호출 정보 표시
-                    if show_process:
-                        with st.expander(f"🔧 {function_name} 호출 중...", expanded=True):
+                # Tool 호출 정보 표시
+                if show_process:
+                    for tool_call in response_message.tool_calls:
+                        with st.expander(f"🔧 {tool_call.function.name} 호출 중...", expanded=True):
                             st.write("**매개변수:**")
-                            st.json(function_args)
-                    
-                    # 도구 실행
-                    function_response = self.execute_tool_call(tool_call)
-                    
+                            st.json(json.loads(tool_call.function.arguments))
+
+                # 도구 동시 실행
+                tool_results = self.execute_tool_calls(response_message.tool_calls)
+
+                for tool_result in tool_results:
+                    function_response = tool_result.content_str
+
                     # Tool 실행 결과 표시
                     if show_process:
-                        with st.expander(f"✅ {function_name} 실행 결과", expanded=True):
+                        with st.expander(f"✅ {tool_result.name} 실행 결과", expanded=True):
                             try:
                                 result_data = json.loads(function_response)
                                 st.json(result_data)
@@ -263,8 +375,8 @@ class ToolCallingManager:
                     # Tool 응답을 메시지에 추가
                     messages.append({
                         "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": function_name,
+                        "tool_call_id": tool_result.tool_call_id,
+                        "name": tool_result.name,
                         "content": function_response,
                     })
                 
@@ -381,3 +493,13 @@ class ToolCallingManager:
 
     # if self.tavily_tools == []:
     #     tavily_tools = asyncio.run(get_tavily_tools())
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_tool_calling_manager(_azure_client: AzureOpenAI, model_name: str) -> ToolCallingManager:
+    """프로세스 전역으로 공유되는 ToolCallingManager
+
+    st.cache_resource 로 워커 프로세스당 한 번만 생성되어 모든 브라우저 세션이
+    MCP 도구 목록, 세션 풀, 디스패처를 공유한다. (_azure_client 는 캐시 키에서 제외)
+    """
+    return ToolCallingManager(azure_client=_azure_client, model_name=model_name)
@@ -0,0 +1,116 @@
+# Tool Dispatch 모듈
+# 한 번의 assistant 응답에 포함된 여러 tool_calls 를 동시에 실행한다.
+# 전체 지연 시간이 sum(t) 가 아닌 max(t) 가 되도록 asyncio.gather 로 fan-out 한다.
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+DEFAULT_TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "60"))
+DEFAULT_TOOL_CALL_MAX_CONCURRENCY = int(os.getenv("TOOL_CALL_MAX_CONCURRENCY", "8"))
+
+
+@dataclass
+class ToolCallResult:
+    """
+    단일 도구 호출 결과
+    - tool_call_id: 모델이 부여한 tool_call id
+    - name / arguments: 호출한 도구 이름과 파싱된 인자
+    - content: 도구 원시 응답
+    - error: 실패(타임아웃 포함)한 경우 메시지
+    - elapsed: 실행 시간(초)
+    """
+    tool_call_id: str
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    content: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def content_str(self) -> str:
+        """tool 메시지 content 로 사용할 문자열 (문자열 결과는 그대로, 그 외는 JSON 직렬화)"""
+        if self.error:
+            return json.dumps({"error": self.error}, ensure_ascii=False)
+        if isinstance(self.content, str):
+            return self.content
+        return json.dumps(self.content, default=str, ensure_ascii=False)
+
+
+def _tool_call_fields(tool_call) -> tuple:
+    """OpenAI ToolCall 객체와 dict 형식 모두에서 (id, name, arguments) 추출"""
+    if isinstance(tool_call, dict):
+        function = tool_call.get("function", {})
+        return tool_call.get("id"), function.get("name"), function.get("arguments")
+    return tool_call.id, tool_call.function.name, tool_call.function.arguments
+
+
+class ToolDispatcher:
+    """여러 도구 호출을 동시에 실행하는 비동기 디스패처
+
+    - executor: (tool_call, tool_name, tool_args) 를 받아 결과를 반환하는 코루틴 함수
+    - max_concurrency: 디스패처 전체에서 동시에 실행되는 도구 호출 수 제한
+    - default_timeout / tool_timeouts: 도구별 타임아웃(초)
+    """
+
+    def __init__(
+        self,
+        executor: Callable[[Any, str, Dict[str, Any]], Awaitable[Any]],
+        max_concurrency: int = DEFAULT_TOOL_CALL_MAX_CONCURRENCY,
+        default_timeout: float = DEFAULT_TOOL_CALL_TIMEOUT,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.executor = executor
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_timeout = default_timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def get_timeout(self, tool_name: str) -> float:
+        return self.tool_timeouts.get(tool_name, self.default_timeout)
+
+    async def _run_one(self, tool_call) -> ToolCallResult:
+        tool_call_id, tool_name, raw_arguments = _tool_call_fields(tool_call)
+        result = ToolCallResult(tool_call_id=tool_call_id, name=tool_name)
+
+        try:
+            result.arguments = json.loads(raw_arguments) if raw_arguments else {}
+        except json.JSONDecodeError as e:
+            result.error = f"Invalid tool arguments: {e}"
+            return result
+
+        async with self._get_semaphore():
+            start = time.perf_counter()
+            try:
+                result.content = await asyncio.wait_for(
+                    self.executor(tool_call, tool_name, result.arguments),
+                    timeout=self.get_timeout(tool_name),
+                )
+            except asyncio.TimeoutError:
+                result.error = f"Tool {tool_name} timed out after {self.get_timeout(tool_name)}s"
+            except Exception as e:
+                result.error = f"Tool {tool_name} execution failed: {e}"
+            finally:
+                result.elapsed = time.perf_counter() - start
+        return result
+
+    async def dispatch(self, tool_calls: List[Any]) -> List[ToolCallResult]:
+        """tool_calls 를 동시에 실행하고, tool_calls 와 같은 위치(index)에 결과 반환
+
+        id 가 중복되거나 비어 있어도 호출마다 결과가 하나씩 대응되도록 gather 순서를 그대로 사용한다.
+        """
+        if not tool_calls:
+            return []
+        return list(await asyncio.gather(*[self._run_one(tool_call) for tool_call in tool_calls]))
@@ -1,21 +1,81 @@
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI, DefaultAsyncHttpxClient, RateLimitError
+import asyncio
+import httpx
 import os
+import threading
+import weakref
 from dotenv import load_dotenv
 from models.base_model import BaseModel
-from typing import Any
+from models.chat_stream import ChatStream
+from models.rate_limiter import RATE_LIMIT_ENABLED, RATE_LIMIT_MAX_RETRIES, RateLimiter, estimate_request_tokens, get_rate_limiter
+from typing import Any, Optional
 load_dotenv()
 
+# AsyncAzureOpenAI 공용 httpx 커넥션 풀 설정
+ASYNC_MAX_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "100"))
+ASYNC_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+ASYNC_KEEPALIVE_EXPIRY = float(os.getenv("AZURE_OPENAI_KEEPALIVE_EXPIRY", "30"))
+ASYNC_REQUEST_TIMEOUT = float(os.getenv("AZURE_OPENAI_TIMEOUT", "60"))
+
+# httpx 커넥션은 이벤트 루프에 묶이므로 (루프, 엔드포인트 설정) 별로 비동기 클라이언트를 공유
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def _get_shared_async_client(api_key: str, azure_endpoint: str, api_version: str) -> AsyncAzureOpenAI:
+    loop = asyncio.get_running_loop()
+    client_key = (azure_endpoint, api_version, api_key)
+    with _async_clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(client_key)
+        if client is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=ASYNC_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(ASYNC_REQUEST_TIMEOUT, connect=10.0),
+            )
+            client = AsyncAzureOpenAI(
+                api_key=api_key,
+                azure_endpoint=azure_endpoint,
+                api_version=api_version,
+                http_client=http_client,
+            )
+            loop_clients[client_key] = client
+        return client
+
+
 class AzureOpenAIModel(BaseModel):
 
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.model_name = os.getenv("OPENAI_BASE_MODEL_NAME")
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        azure_endpoint: Optional[str] = None,
+        deployment: Optional[str] = None,
+        api_version: Optional[str] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        rate_limit_retries: int = RATE_LIMIT_MAX_RETRIES,
+    ):
+        # 인자가 없으면 환경 변수 값 사용 (단일 배포 설정)
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.azure_endpoint = azure_endpoint or os.getenv("AZURE_OPENAI_ENDPOINT")
+        self.model_name = deployment or os.getenv("OPENAI_BASE_MODEL_NAME")
         self.api_type = os.getenv("OPENAI_API_TYPE")
-        self.api_version = os.getenv("OPENAI_API_VERSION")
-        self.base_model_name = os.getenv("OPENAI_BASE_MODEL_NAME")
+        self.api_version = api_version or os.getenv("OPENAI_API_VERSION")
+        self.base_model_name = self.model_name
+        self.rate_limit_retries = max(0, rate_limit_retries)
 
         self.client = self._init_client()
+        # 같은 배포를 쓰는 모든 세션이 요청 / 토큰 예산을 공유
+        limiter_kwargs = {}
+        if requests_per_minute is not None:
+            limiter_kwargs["requests_per_minute"] = requests_per_minute
+        if tokens_per_minute is not None:
+            limiter_kwargs["tokens_per_minute"] = tokens_per_minute
+        self.rate_limiter: RateLimiter = get_rate_limiter(f"{self.azure_endpoint}|{self.base_model_name}", **limiter_kwargs)
 
     def _init_client(self) -> AzureOpenAI:
         return AzureOpenAI(
@@ -23,8 +83,13 @@ class AzureOpenAIModel(BaseModel):
             azure_endpoint=self.azure_endpoint,
             api_version=self.api_version
         )
-    
-    def chat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}) -> Any:
+
+    @property
+    def async_client(self) -> AsyncAzureOpenAI:
+        """현재 이벤트 루프에서 공유되는 AsyncAzureOpenAI (코루틴 안에서만 사용)"""
+        return _get_shared_async_client(self.api_key, self.azure_endpoint, self.api_version)
+
+    def _build_create_kwargs(self, messages: list, tools: list, temperature: float, extra_body: dict) -> dict:
         # extra_body는 Azure OpenAI의 확장 파라미터(예: data_sources)를 전달하기 위해 사용됨
         create_kwargs = {
             "model": self.base_model_name,
@@ -39,7 +104,85 @@ class AzureOpenAIModel(BaseModel):
         if extra_body:
             create_kwargs["extra_body"] = extra_body
 
-        return self.client.chat.completions.create(**create_kwargs)
+        return create_kwargs
+    
+    def _usage_tokens(self, response: Any) -> Any:
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", None)
+
+    def _create(self, create_kwargs: dict) -> Any:
+        stream = bool(create_kwargs.get("stream"))
+        if not RATE_LIMIT_ENABLED:
+            response = self.client.chat.completions.create(**create_kwargs)
+            return ChatStream(response) if stream else response
+
+        # 요청 전 토큰을 추정해 버킷에서 예약하고, 응답 헤더(x-ratelimit-remaining-*)와 usage 로 보정
+        estimated_tokens = estimate_request_tokens(create_kwargs, self.base_model_name)
+        for attempt in range(self.rate_limit_retries + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                raw_response = self.client.chat.completions.with_raw_response.create(**create_kwargs)
+            except RateLimitError as e:
+                self.rate_limiter.release(estimated_tokens, headers=e.response.headers, rate_limited=True)
+                if attempt >= self.rate_limit_retries:
+                    raise
+                continue
+            except Exception:
+                self.rate_limiter.release(estimated_tokens)
+                raise
+            response = raw_response.parse()
+            if not stream:
+                self.rate_limiter.release(estimated_tokens, self._usage_tokens(response), headers=raw_response.headers)
+                return response
+
+            # 스트리밍은 마지막 chunk 를 받거나 닫힐 때까지 동시성 슬롯을 유지하고, 마지막 usage chunk 로 토큰 보정
+            headers = raw_response.headers
+            return ChatStream(response).add_done_callback(
+                lambda chat_stream, error: self.rate_limiter.release(estimated_tokens, self._usage_tokens(chat_stream), headers=headers)
+            )
+
+    async def _acreate(self, create_kwargs: dict) -> Any:
+        client = self.async_client
+        if not RATE_LIMIT_ENABLED:
+            return await client.chat.completions.create(**create_kwargs)
+
+        estimated_tokens = estimate_request_tokens(create_kwargs, self.base_model_name)
+        for attempt in range(self.rate_limit_retries + 1):
+            await self.rate_limiter.aacquire(estimated_tokens)
+            try:
+                raw_response = await client.chat.completions.with_raw_response.create(**create_kwargs)
+            except RateLimitError as e:
+                self.rate_limiter.release(estimated_tokens, headers=e.response.headers, rate_limited=True)
+                if attempt >= self.rate_limit_retries:
+                    raise
+                continue
+            except Exception:
+                self.rate_limiter.release(estimated_tokens)
+                raise
+            response = raw_response.parse()
+            self.rate_limiter.release(estimated_tokens, self._usage_tokens(response), headers=raw_response.headers)
+            return response
+
+    def chat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}, stream: bool = False) -> Any:
+        create_kwargs = self._build_create_kwargs(messages, tools, temperature, extra_body)
+
+        if stream:
+            # 토큰 단위 delta 를 바로 전달하기 위한 스트리밍 모드
+            create_kwargs["stream"] = True
+            # 마지막 chunk 로 usage 를 받아 rate limiter 토큰 버킷을 보정
+            # (data_sources 확장 요청은 stream_options 를 지원하지 않아 추정치를 그대로 사용)
+            if not (extra_body or {}).get("data_sources"):
+                create_kwargs["stream_options"] = {"include_usage": True}
+
+        return self._create(create_kwargs)
+
+    async def achat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}) -> Any:
+        # 하나의 스레드/루프에서 여러 요청을 동시에 처리하기 위한 비동기 호출
+        create_kwargs = self._build_create_kwargs(messages, tools, temperature, extra_body)
+        return await self._acreate(create_kwargs)
+
+    def rate_limit_stats(self) -> dict:
+        return self.rate_limiter.stats()
 
     @property
     def get_client(self) -> AzureOpenAI:
@@ -52,4 +195,3 @@ class AzureOpenAIModel(BaseModel):
     @property
     def get_model_version(self) -> str:
         return self.api_version
-
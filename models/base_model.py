@@ -18,5 +18,10 @@ class BaseModel(ABC):
         raise NotImplementedError("get_model_version method must be implemented")
     
     @abstractmethod
-    def chat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}) -> Any:
-        raise NotImplementedError("chat method must be implemented")
\ No newline at end of file
+    def chat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}, stream: bool = False) -> Any:
+        # stream=True 인 경우 텍스트 delta 를 순회하는 ChatStream 반환
+        raise NotImplementedError("chat method must be implemented")
+
+    @abstractmethod
+    async def achat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}) -> Any:
+        raise NotImplementedError("achat method must be implemented")
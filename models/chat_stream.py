@@ -0,0 +1,141 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class ChatStream:
+    """chat.completions 스트리밍 응답 래퍼
+
+    - 순회하면 텍스트 delta(str)를 순서대로 반환 (st.write_stream 에 그대로 전달 가능)
+    - 순회하는 동안 content, tool_calls 조각, finish_reason, Azure data_sources context 를 누적
+    - tool_calls 는 chunk 마다 index 기준으로 id/name/arguments 조각이 나뉘어 오므로 index 별로 이어 붙임
+    - 끝까지 읽거나(오류 포함) close() 를 호출하면 done callback 을 한 번 호출 (rate limit 슬롯 반환 등)
+    - 중간에 멈출 수 있는 소비자는 반드시 close() 를 호출 (GC 시점에는 done callback 을 호출하지 않음)
+    """
+
+    def __init__(self, stream: Any):
+        self._stream = stream
+        self._iterator: Optional[Iterator[str]] = None
+        self.content: str = ""
+        self.finish_reason: Optional[str] = None
+        self.context: Optional[Dict[str, Any]] = None
+        self.usage: Optional[Any] = None
+        self.done: bool = False
+        self._tool_calls: Dict[int, Dict[str, Any]] = {}
+        self._delta_listeners: List[Callable[[str], None]] = []
+        self._done_callbacks: List[Callable[["ChatStream", Optional[BaseException]], None]] = []
+        self._finished = False
+
+    def add_delta_listener(self, listener: Callable[[str], None]) -> "ChatStream":
+        """텍스트 delta 가 도착할 때마다 호출할 함수 등록 (예: citation 마커 점진 파싱)"""
+        self._delta_listeners.append(listener)
+        return self
+
+    def add_done_callback(self, callback: Callable[["ChatStream", Optional[BaseException]], None]) -> "ChatStream":
+        """스트림 종료 시 callback(stream, error) 호출 (정상 종료 / close() 는 error=None)"""
+        if self._finished:
+            callback(self, None)
+        else:
+            self._done_callbacks.append(callback)
+        return self
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        for callback in self._done_callbacks:
+            try:
+                callback(self, error)
+            except Exception as e:
+                print(f"ChatStream 종료 처리 실패: {e}")
+
+    def close(self) -> None:
+        """끝까지 읽지 않은 스트림의 HTTP 응답을 닫고 done callback 호출"""
+        if self._iterator is not None:
+            self._iterator.close()
+        close_stream = getattr(self._stream, "close", None)
+        if close_stream is not None:
+            close_stream()
+        self._finish(None)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    def _iterate(self) -> Iterator[str]:
+        try:
+            yield from self._iterate_chunks()
+        except GeneratorExit:
+            # 중간에 닫힌 경우는 close() 에서 종료 처리 (GC finalizer 스레드에서 lock 을 잡지 않도록)
+            raise
+        except Exception as e:
+            self._finish(e)
+            raise
+        self._finish(None)
+
+    def _iterate_chunks(self) -> Iterator[str]:
+        for chunk in self._stream:
+            if getattr(chunk, "usage", None):
+                self.usage = chunk.usage
+            # Azure 는 content filter 결과 등 choices 가 빈 chunk 를 보내기도 함
+            for choice in chunk.choices or []:
+                if choice.index != 0:
+                    continue
+                delta = choice.delta
+                if delta is not None:
+                    self._accumulate_context(getattr(delta, "context", None))
+                    self._accumulate_tool_calls(delta.tool_calls)
+                    if delta.content:
+                        self.content += delta.content
+                        for listener in self._delta_listeners:
+                            listener(delta.content)
+                        yield delta.content
+                if choice.finish_reason:
+                    self.finish_reason = choice.finish_reason
+        self.done = True
+
+    def _accumulate_context(self, context: Optional[Dict[str, Any]]) -> None:
+        # data_sources 사용 시 citations/intent 가 delta.context 로 전달됨
+        if not context or not isinstance(context, dict):
+            return
+        if self.context is None:
+            self.context = {}
+        for key, value in context.items():
+            if isinstance(value, list):
+                self.context.setdefault(key, [])
+                self.context[key].extend(value)
+            else:
+                self.context[key] = value
+
+    def _accumulate_tool_calls(self, tool_call_deltas: Optional[List[Any]]) -> None:
+        for tool_call_delta in tool_call_deltas or []:
+            tool_call = self._tool_calls.setdefault(
+                tool_call_delta.index,
+                {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+            )
+            if tool_call_delta.id:
+                tool_call["id"] = tool_call_delta.id
+            if tool_call_delta.type:
+                tool_call["type"] = tool_call_delta.type
+            function = tool_call_delta.function
+            if function is not None:
+                if function.name:
+                    tool_call["function"]["name"] += function.name
+                if function.arguments:
+                    tool_call["function"]["arguments"] += function.arguments
+
+    def consume(self) -> "ChatStream":
+        """남은 스트림을 모두 소비 (화면 출력 없이 결과만 필요한 경우)"""
+        for _ in self:
+            pass
+        return self
+
+    @property
+    def tool_calls(self) -> List[Dict[str, Any]]:
+        """누적된 tool_calls (index 순서, OpenAI 메시지 dict 형식)"""
+        return [self._tool_calls[index] for index in sorted(self._tool_calls)]
+
+    def to_assistant_message(self) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": self.content}
+        if self._tool_calls:
+            message["tool_calls"] = self.tool_calls
+        return message
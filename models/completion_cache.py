@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from openai.types.chat import ChatCompletion
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMPLETION_CACHE_ENABLED = os.getenv("COMPLETION_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+COMPLETION_CACHE_PATH = os.getenv("COMPLETION_CACHE_PATH", os.path.join(PROJECT_ROOT, ".cache", "completion_cache.sqlite3"))
+COMPLETION_CACHE_TTL = float(os.getenv("COMPLETION_CACHE_TTL", "86400"))
+COMPLETION_CACHE_MEMORY_SIZE = int(os.getenv("COMPLETION_CACHE_MEMORY_SIZE", "256"))
+COMPLETION_CACHE_DISK_MAX_ENTRIES = int(os.getenv("COMPLETION_CACHE_DISK_MAX_ENTRIES", "10000"))
+
+
+def _to_jsonable(value: Any) -> Any:
+    # messages 에 ChatCompletionMessage 같은 pydantic 객체가 섞여 있어도 동일한 키가 나오도록 변환
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    return str(value)
+
+
+def build_cache_key(payload: Dict[str, Any]) -> str:
+    """요청 payload(model, messages, tools, temperature, extra_body)의 정규화된 sha256 해시"""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_to_jsonable)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """결정적(temperature=0) chat completion 응답 캐시
+
+    - 1차: 프로세스 메모리 LRU (memory_size 개)
+    - 2차: SQLite 디스크 캐시 (disk_max_entries 개, 마지막 접근 시각 기준 제거)
+    - 두 계층 모두 ttl(초)이 지난 항목은 무효
+    """
+
+    def __init__(
+        self,
+        path: str = COMPLETION_CACHE_PATH,
+        ttl: float = COMPLETION_CACHE_TTL,
+        memory_size: int = COMPLETION_CACHE_MEMORY_SIZE,
+        disk_max_entries: int = COMPLETION_CACHE_DISK_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.memory_size = max(0, memory_size)
+        self.disk_max_entries = max(0, disk_max_entries)
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+        }
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _is_expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return ChatCompletion.model_validate_json(value)
+                del self._memory[key]
+
+            value = None
+            if self.disk_max_entries > 0:
+                try:
+                    conn = self._get_conn()
+                    row = conn.execute("SELECT value, created_at FROM completions WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        if self._is_expired(row[1]):
+                            conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                        else:
+                            value, created_at = row
+                            conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (time.time(), key))
+                        conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Completion 캐시 조회 실패: {e}")
+
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["disk_hits"] += 1
+            self._remember(key, value, created_at)
+            return ChatCompletion.model_validate_json(value)
+
+    def set(self, key: str, response: ChatCompletion) -> None:
+        value = response.model_dump_json()
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["sets"] += 1
+            if self.disk_max_entries <= 0:
+                return
+            try:
+                conn = self._get_conn()
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._evict_disk(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Completion 캐시 저장 실패: {e}")
+
+    def _evict_disk(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl,))
+        count = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        overflow = count - self.disk_max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM completions WHERE key IN (SELECT key FROM completions ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._stats["evictions"] += overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self.disk_max_entries > 0:
+                try:
+                    conn = self._get_conn()
+                    conn.execute("DELETE FROM completions")
+                    conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Completion 캐시 삭제 실패: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            total = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hits": hits,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+_completion_cache: Optional[CompletionCache] = None
+_completion_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """프로세스 전역 CompletionCache"""
+    global _completion_cache
+    with _completion_cache_lock:
+        if _completion_cache is None:
+            _completion_cache = CompletionCache()
+        return _completion_cache
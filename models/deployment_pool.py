@@ -0,0 +1,221 @@
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import openai
+from openai import AzureOpenAI
+
+from models.azure_openai_model import AzureOpenAIModel
+from models.base_model import BaseModel
+from models.chat_stream import ChatStream
+from models.rate_limiter import RateLimitQueueTimeout
+
+
+# 여러 리전 / 배포 설정 (JSON 배열)
+# [{"name": "eastus", "endpoint": "...", "api_key": "...", "deployment": "gpt-4o", "api_version": "...", "weight": 2, "rpm": 0, "tpm": 0}]
+# 생략한 항목은 AZURE_OPENAI_ENDPOINT / OPENAI_API_KEY / OPENAI_BASE_MODEL_NAME / OPENAI_API_VERSION 값을 사용
+AZURE_OPENAI_DEPLOYMENTS = os.getenv("AZURE_OPENAI_DEPLOYMENTS", "")
+# 연속 실패가 이 횟수에 도달하면 배포를 일정 시간 제외(eject)
+DEPLOYMENT_EJECT_AFTER_FAILURES = int(os.getenv("DEPLOYMENT_EJECT_AFTER_FAILURES", "3"))
+DEPLOYMENT_EJECT_SECONDS = float(os.getenv("DEPLOYMENT_EJECT_SECONDS", "30"))
+DEPLOYMENT_EJECT_MAX_SECONDS = float(os.getenv("DEPLOYMENT_EJECT_MAX_SECONDS", "300"))
+
+# 다른 배포로 넘겨서 다시 시도할 오류 (429, 5xx, 연결 / 타임아웃, 대기열 초과)
+_FAILOVER_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError, RateLimitQueueTimeout)
+
+
+def _is_failover_error(error: Exception) -> bool:
+    if isinstance(error, _FAILOVER_ERRORS):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+@dataclass
+class Deployment:
+    """풀에 포함된 단일 배포와 상태 (outstanding: 처리 중인 요청 수)"""
+    name: str
+    model: AzureOpenAIModel
+    weight: float = 1.0
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    stats: Dict[str, int] = field(default_factory=lambda: {"requests": 0, "failures": 0, "failovers": 0})
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+
+class DeploymentPool(BaseModel):
+    """
+    가중치 기반 다중 배포 풀
+    - 라우팅: 제외되지 않은 배포 중 (처리 중 요청 수 + 1) / weight 가 가장 작은 배포 (동률이면 무작위)
+    - 429 / 5xx / 연결 오류는 아직 시도하지 않은 다른 배포로 즉시 failover
+      (로컬 rate limiter 대기열 초과도 failover 하지만 배포 실패로 세지 않음)
+    - 스트리밍 응답은 끝까지 읽거나 close() 될 때까지 outstanding 에 포함하고, 종료 시점의 오류로 상태 갱신
+      (호출자가 ChatStream.close() 를 보장해야 함, 예: core.chat_view.write_stream_message)
+    - 연속 실패가 DEPLOYMENT_EJECT_AFTER_FAILURES 회가 되면 일정 시간 제외 (반복 시 제외 시간 2배, 최대 DEPLOYMENT_EJECT_MAX_SECONDS)
+    - 모든 배포가 제외된 경우에는 가장 먼저 복귀할 배포로 요청
+    - client / model_name 등 단일 모델 속성은 첫 번째 배포 기준
+    """
+
+    def __init__(self, deployments: List[Deployment]):
+        if not deployments:
+            raise ValueError("배포가 최소 1개 필요합니다.")
+        self.deployments = deployments
+        self._lock = threading.Lock()
+
+        primary = deployments[0].model
+        self.client = primary.client
+        self.model_name = primary.model_name
+        self.base_model_name = primary.base_model_name
+        self.api_type = primary.api_type
+        self.api_version = primary.api_version
+
+    @classmethod
+    def from_env(cls) -> "DeploymentPool":
+        configs = json.loads(AZURE_OPENAI_DEPLOYMENTS) if AZURE_OPENAI_DEPLOYMENTS.strip() else [{}]
+        # 배포가 여러 개이면 429 는 같은 배포에서 재시도하지 않고 바로 다른 배포로 넘김
+        rate_limit_retries = {"rate_limit_retries": 0} if len(configs) > 1 else {}
+        deployments = []
+        for index, config in enumerate(configs):
+            model = AzureOpenAIModel(
+                api_key=config.get("api_key"),
+                azure_endpoint=config.get("endpoint"),
+                deployment=config.get("deployment"),
+                api_version=config.get("api_version"),
+                requests_per_minute=config.get("rpm"),
+                tokens_per_minute=config.get("tpm"),
+                **rate_limit_retries,
+            )
+            deployments.append(Deployment(
+                name=config.get("name") or f"deployment-{index}",
+                model=model,
+                weight=max(float(config.get("weight", 1)), 0.01),
+            ))
+        return cls(deployments)
+
+    def _select(self, excluded: List[Deployment]) -> Optional[Deployment]:
+        """다음 요청을 보낼 배포 선택 후 outstanding 증가 (시도할 배포가 없으면 None)"""
+        with self._lock:
+            candidates = [deployment for deployment in self.deployments if deployment not in excluded]
+            if not candidates:
+                return None
+            now = time.time()
+            healthy = [deployment for deployment in candidates if deployment.is_healthy(now)]
+            if healthy:
+                lowest = min(deployment.load() for deployment in healthy)
+                selected = random.choice([deployment for deployment in healthy if deployment.load() == lowest])
+            else:
+                selected = min(candidates, key=lambda deployment: deployment.ejected_until)
+            selected.outstanding += 1
+            selected.stats["requests"] += 1
+            return selected
+
+    def _finish(self, deployment: Deployment, error: Optional[Exception]) -> None:
+        with self._lock:
+            deployment.outstanding = max(0, deployment.outstanding - 1)
+            # 로컬 대기열 초과는 배포 상태와 무관하므로 성공 / 실패 어느 쪽으로도 집계하지 않음
+            if isinstance(error, RateLimitQueueTimeout):
+                return
+            if error is None:
+                deployment.consecutive_failures = 0
+                deployment.ejections = 0
+                return
+            deployment.stats["failures"] += 1
+            # 이미 제외된 배포에서 뒤늦게 끝난 요청의 실패는 제외 시간을 다시 늘리지 않음
+            if not deployment.is_healthy(time.time()):
+                return
+            deployment.consecutive_failures += 1
+            if deployment.consecutive_failures >= DEPLOYMENT_EJECT_AFTER_FAILURES:
+                eject_seconds = min(DEPLOYMENT_EJECT_SECONDS * (2 ** deployment.ejections), DEPLOYMENT_EJECT_MAX_SECONDS)
+                deployment.ejected_until = time.time() + eject_seconds
+                deployment.ejections += 1
+                deployment.consecutive_failures = 0
+                print(f"Azure OpenAI 배포 {deployment.name} 를 {eject_seconds:.0f}초 동안 제외합니다. ({error})")
+
+    def _handle_error(self, deployment: Deployment, tried: List[Deployment], error: Exception) -> None:
+        """failover 대상이 아니거나 모든 배포를 시도했으면 오류를 다시 발생"""
+        if not _is_failover_error(error):
+            self._finish(deployment, None)
+            raise error
+        self._finish(deployment, error)
+        tried.append(deployment)
+        if len(tried) >= len(self.deployments):
+            raise error
+        with self._lock:
+            deployment.stats["failovers"] += 1
+
+    def _finish_stream(self, deployment: Deployment, error: Optional[BaseException]) -> None:
+        self._finish(deployment, error if isinstance(error, Exception) and _is_failover_error(error) else None)
+
+    def _call(self, request: Callable[[AzureOpenAIModel], Any]) -> Any:
+        tried: List[Deployment] = []
+        while True:
+            deployment = self._select(tried)
+            try:
+                response = request(deployment.model)
+            except Exception as e:
+                self._handle_error(deployment, tried, e)
+                continue
+            if isinstance(response, ChatStream):
+                # delta 를 모두 받거나 호출자가 close() 할 때 처리 완료로 집계 (GC 시점에는 lock 을 잡지 않음)
+                return response.add_done_callback(lambda stream, error: self._finish_stream(deployment, error))
+            self._finish(deployment, None)
+            return response
+
+    async def _acall(self, request: Callable[[AzureOpenAIModel], Awaitable[Any]]) -> Any:
+        tried: List[Deployment] = []
+        while True:
+            deployment = self._select(tried)
+            try:
+                response = await request(deployment.model)
+            except Exception as e:
+                self._handle_error(deployment, tried, e)
+                continue
+            self._finish(deployment, None)
+            return response
+
+    def chat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}, stream: bool = False) -> Any:
+        # 스트리밍은 응답 헤더를 받은 시점까지만 failover 대상 (이후 delta 는 같은 배포에서 수신)
+        return self._call(lambda model: model.chat(messages, tools, temperature, extra_body, stream))
+
+    async def achat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}) -> Any:
+        return await self._acall(lambda model: model.achat(messages, tools, temperature, extra_body))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            now = time.time()
+            return [
+                {
+                    "name": deployment.name,
+                    "endpoint": deployment.model.azure_endpoint,
+                    "deployment": deployment.model.base_model_name,
+                    "weight": deployment.weight,
+                    "outstanding": deployment.outstanding,
+                    "healthy": deployment.is_healthy(now),
+                    "ejected_seconds": max(0.0, deployment.ejected_until - now),
+                    **deployment.stats,
+                    "rate_limit": deployment.model.rate_limit_stats(),
+                }
+                for deployment in self.deployments
+            ]
+
+    @property
+    def get_client(self) -> AzureOpenAI:
+        return self.client
+
+    @property
+    def get_model_name(self) -> str:
+        return self.model_name
+
+    @property
+    def get_model_version(self) -> str:
+        return self.api_version
@@ -1,6 +1,7 @@
 import os
-from models.azure_openai_model import AzureOpenAIModel
-from typing import Any
+from models.deployment_pool import DeploymentPool
+from models.completion_cache import COMPLETION_CACHE_ENABLED, build_cache_key, get_completion_cache
+from typing import Any, Optional
 
 class Model:
 
@@ -10,7 +11,8 @@ class Model:
     def init_model(self):
         model_provider = os.getenv("MODEL_PROVIDER")
         if model_provider == "azure-openai":
-            self.model_runner = AzureOpenAIModel()
+            # AZURE_OPENAI_DEPLOYMENTS 에 여러 배포가 있으면 부하 분산 / failover, 없으면 단일 배포
+            self.model_runner = DeploymentPool.from_env()
         else:
             raise ValueError(f"Invalid model provider: {model_provider}")
     
@@ -29,8 +31,50 @@ class Model:
     def api_version(self):
         return self.model_runner.api_version
     
-    def chat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}) -> Any:
-        return self.model_runner.chat(messages, tools, temperature, extra_body)
+    def _completion_cache_key(self, messages: list, tools: list, temperature: float, extra_body: dict, stream: bool, use_cache: Optional[bool]) -> Optional[str]:
+        # 캐시는 opt-in (use_cache 또는 COMPLETION_CACHE_ENABLED) 이며 결정적 요청(temperature 0, 비스트리밍)에만 적용
+        enabled = COMPLETION_CACHE_ENABLED if use_cache is None else use_cache
+        if not enabled or stream or temperature != 0:
+            return None
+        return build_cache_key({
+            "model": self.base_model_name(),
+            "messages": messages,
+            "tools": tools or [],
+            "temperature": temperature,
+            "extra_body": extra_body or {},
+        })
+
+    def chat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}, stream: bool = False, use_cache: Optional[bool] = None) -> Any:
+        cache_key = self._completion_cache_key(messages, tools, temperature, extra_body, stream, use_cache)
+        if cache_key:
+            cached_response = get_completion_cache().get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        response = self.model_runner.chat(messages, tools, temperature, extra_body, stream)
+
+        if cache_key and response.choices:
+            get_completion_cache().set(cache_key, response)
+        return response
+
+    async def achat(self, messages: list, tools: list = [], temperature: float = 0.4, extra_body: dict = {}, use_cache: Optional[bool] = None) -> Any:
+        cache_key = self._completion_cache_key(messages, tools, temperature, extra_body, False, use_cache)
+        if cache_key:
+            cached_response = get_completion_cache().get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        response = await self.model_runner.achat(messages, tools, temperature, extra_body)
+
+        if cache_key and response.choices:
+            get_completion_cache().set(cache_key, response)
+        return response
+
+    def completion_cache_stats(self) -> dict:
+        return get_completion_cache().stats()
+
+    def deployment_stats(self) -> list:
+        return self.model_runner.stats()
 
 model = Model()
 
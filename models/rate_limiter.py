@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from models.token_counter import count_messages_tokens, count_tokens
+
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# 배포(deployment)의 분당 요청 수 / 분당 토큰 수 (0 이면 버킷 없이 429 / 응답 헤더 기반 동시성 조절만 사용)
+AZURE_OPENAI_RPM = int(os.getenv("AZURE_OPENAI_RPM", "0"))
+AZURE_OPENAI_TPM = int(os.getenv("AZURE_OPENAI_TPM", "0"))
+# 동시 요청 수 상한 (429 가 나면 절반으로 줄이고 성공이 이어지면 1씩 회복)
+RATE_LIMIT_MAX_CONCURRENCY = int(os.getenv("RATE_LIMIT_MAX_CONCURRENCY", "16"))
+# 요청을 실패 처리하기 전까지 대기열에서 기다리는 최대 시간(초)
+RATE_LIMIT_MAX_QUEUE_WAIT = float(os.getenv("RATE_LIMIT_MAX_QUEUE_WAIT", "30"))
+# 429 응답 후 재시도 횟수
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+# max_tokens 가 없는 요청의 응답 토큰 추정치
+RATE_LIMIT_COMPLETION_TOKENS = int(os.getenv("RATE_LIMIT_COMPLETION_TOKENS", "512"))
+
+_POLL_INTERVAL = 0.05
+_MAX_SLEEP = 1.0
+
+
+class RateLimitQueueTimeout(RuntimeError):
+    """대기열에서 max_queue_wait 안에 요청 슬롯을 얻지 못한 경우"""
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    # retry-after-ms(밀리초) 또는 Retry-After(초)
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = (headers or {}).get(header)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+def _header_int(headers: Optional[Mapping[str, str]], name: str) -> Optional[int]:
+    value = (headers or {}).get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def estimate_request_tokens(create_kwargs: Dict[str, Any], model_name: Optional[str] = None) -> int:
+    """요청 1건이 소모할 토큰 추정치 (프롬프트 + tools 정의 + 최대 응답 토큰)"""
+    tokens = count_messages_tokens(create_kwargs.get("messages") or [], model_name)
+    if create_kwargs.get("tools"):
+        tokens += count_tokens(json.dumps(create_kwargs["tools"], ensure_ascii=False, default=str), model_name)
+    return tokens + int(create_kwargs.get("max_tokens") or RATE_LIMIT_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    """분당 capacity 만큼 채워지는 토큰 버킷 (capacity 0 = 제한 없음)"""
+
+    def __init__(self, capacity: float):
+        self.capacity = float(max(0, capacity))
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def limited(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self, now: float) -> None:
+        if self.limited:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount 를 꺼낼 수 있을 때까지 남은 시간(초)"""
+        self._refill(now)
+        if not self.limited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+    def take(self, amount: float) -> None:
+        if self.limited:
+            self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        if self.limited:
+            self.level = min(self.capacity, self.level + amount)
+
+    def observe_remaining(self, remaining: int, now: float) -> None:
+        """응답 헤더의 남은 양으로 버킷 보정 (다른 프로세스 / 클라이언트가 쓴 양까지 반영)"""
+        self._refill(now)
+        if self.limited:
+            self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """
+    배포(deployment)별 요청 / 토큰 버킷과 적응형 동시성 제한
+    - acquire / aacquire: 슬롯을 얻을 때까지 최대 max_queue_wait 초 대기 (초과 시 RateLimitQueueTimeout)
+    - release: 실제 사용 토큰으로 추정치 보정, x-ratelimit-remaining-* 헤더 반영,
+      429 이면 동시성 제한을 절반으로 줄이고 Retry-After 동안 새 요청을 멈춤
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        requests_per_minute: int = AZURE_OPENAI_RPM,
+        tokens_per_minute: int = AZURE_OPENAI_TPM,
+        max_concurrency: int = RATE_LIMIT_MAX_CONCURRENCY,
+        max_queue_wait: float = RATE_LIMIT_MAX_QUEUE_WAIT,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_wait = max_queue_wait
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._concurrency_limit = self.max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, float] = {"acquired": 0, "queued": 0, "queue_seconds": 0.0, "rate_limited": 0, "timeouts": 0}
+
+    def _try_acquire(self, tokens: int) -> float:
+        """슬롯을 얻으면 0, 아니면 다시 시도할 때까지 기다릴 시간(초)"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._in_flight >= self._concurrency_limit:
+                return _POLL_INTERVAL
+            wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self._in_flight += 1
+            self._stats["acquired"] += 1
+            return 0.0
+
+    def _next_sleep(self, wait: float, started: float) -> float:
+        remaining = self.max_queue_wait - (time.monotonic() - started)
+        if remaining <= 0:
+            # 대기열에서 기다린 요청이므로 queued / queue_seconds 에도 포함하고, 실패는 timeouts 로 따로 집계
+            self._record_queue_time(started, True)
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise RateLimitQueueTimeout(f"Azure OpenAI 요청 대기 시간({self.max_queue_wait:g}초)을 초과했습니다. ({self.name})")
+        return min(wait, remaining, _MAX_SLEEP)
+
+    def _record_queue_time(self, started: float, queued: bool) -> None:
+        if queued:
+            with self._lock:
+                self._stats["queued"] += 1
+                self._stats["queue_seconds"] += time.monotonic() - started
+
+    def acquire(self, tokens: int) -> None:
+        started = time.monotonic()
+        queued = False
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                self._record_queue_time(started, queued)
+                return
+            queued = True
+            time.sleep(self._next_sleep(wait, started))
+
+    async def aacquire(self, tokens: int) -> None:
+        started = time.monotonic()
+        queued = False
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                self._record_queue_time(started, queued)
+                return
+            queued = True
+            await asyncio.sleep(self._next_sleep(wait, started))
+
+    def release(
+        self,
+        estimated_tokens: int,
+        used_tokens: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        rate_limited: bool = False,
+    ) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._in_flight = max(0, self._in_flight - 1)
+            if used_tokens is not None:
+                if used_tokens < estimated_tokens:
+                    self._tokens.give_back(estimated_tokens - used_tokens)
+                else:
+                    self._tokens.take(used_tokens - estimated_tokens)
+
+            remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+            remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+            if remaining_requests is not None:
+                self._requests.observe_remaining(remaining_requests, now)
+            if remaining_tokens is not None:
+                self._tokens.observe_remaining(remaining_tokens, now)
+
+            if rate_limited:
+                self._stats["rate_limited"] += 1
+                self._successes = 0
+                self._concurrency_limit = max(1, self._concurrency_limit // 2)
+                self._paused_until = max(self._paused_until, now + (retry_after_seconds(headers) or 1.0))
+            elif remaining_tokens is not None and remaining_tokens < estimated_tokens:
+                # 남은 토큰이 요청 1건 분량보다 적으면 곧 429 가 나므로 동시성을 미리 줄임
+                self._concurrency_limit = max(1, self._concurrency_limit - 1)
+            else:
+                # 성공이 현재 제한 수만큼 이어질 때마다 1씩 회복 (additive increase)
+                self._successes += 1
+                if self._successes >= self._concurrency_limit and self._concurrency_limit < self.max_concurrency:
+                    self._concurrency_limit += 1
+                    self._successes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._requests._refill(now)
+            self._tokens._refill(now)
+            # 제한 없는 버킷(RPM / TPM 미설정)은 None
+            return {
+                **self._stats,
+                "in_flight": self._in_flight,
+                "concurrency_limit": self._concurrency_limit,
+                "requests_per_minute": self._requests.capacity if self._requests.limited else None,
+                "tokens_per_minute": self._tokens.capacity if self._tokens.limited else None,
+                "tokens_available": self._tokens.level if self._tokens.limited else None,
+                "paused_seconds": max(0.0, self._paused_until - now),
+            }
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, **kwargs: Any) -> RateLimiter:
+    """배포 식별자(엔드포인트 + 배포 이름)별로 프로세스 전역 RateLimiter 공유"""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter(name, **kwargs)
+            _rate_limiters[name] = limiter
+        return limiter
@@ -0,0 +1,83 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# tiktoken 이 설치되어 있으면 정확한 토큰 수를, 없으면 문자 기반 근사치를 사용
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_ENCODING_NAME = "o200k_base"
+# 메시지 1개당 role/구분자 등 포맷 오버헤드 (OpenAI cookbook 기준 근사치)
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: Optional[str] = None):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name) if model_name else tiktoken.get_encoding(DEFAULT_ENCODING_NAME)
+    except Exception:
+        try:
+            return tiktoken.get_encoding(DEFAULT_ENCODING_NAME)
+        except Exception:
+            return None
+
+
+def _approximate_tokens(text: str) -> int:
+    # 영문/숫자는 약 4자당 1토큰, 한글 등 비 ASCII 문자는 문자당 약 1토큰
+    ascii_count = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_count + 3) // 4 + (len(text) - ascii_count)
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding(model_name)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _approximate_tokens(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None, suffix: str = " ...(생략)") -> str:
+    """text 를 max_tokens 이내로 자르고, 잘린 경우 suffix 를 붙여 반환"""
+    if not text or count_tokens(text, model_name) <= max_tokens:
+        return text
+    encoding = _get_encoding(model_name)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + suffix
+
+    tokens = 0.0
+    for index, ch in enumerate(text):
+        tokens += 0.25 if ord(ch) < 128 else 1.0
+        if tokens > max_tokens:
+            return text[:index] + suffix
+    return text
+
+
+def _content_text(content: Any) -> str:
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    # 멀티파트 content([{type: text, text: ...}])
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content)
+
+
+def count_message_tokens(message: Dict[str, Any], model_name: Optional[str] = None) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(_content_text(message.get("content")), model_name)
+    if message.get("name"):
+        tokens += count_tokens(message["name"], model_name)
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {}) if isinstance(tool_call, dict) else {}
+        tokens += count_tokens(function.get("name", ""), model_name)
+        tokens += count_tokens(function.get("arguments", ""), model_name)
+    return tokens
+
+
+def count_messages_tokens(messages: List[Dict[str, Any]], model_name: Optional[str] = None) -> int:
+    return sum(count_message_tokens(message, model_name) for message in messages) + REPLY_PRIMING_TOKENS
@@ -2,7 +2,9 @@ import streamlit as st
 from azure.core.exceptions import HttpResponseError, ClientAuthenticationError, ResourceNotFoundError
 from dotenv import load_dotenv
 import json
-from core.tool_calling import ToolCallingManager
+from core.tool_calling import get_shared_tool_calling_manager
+from core.chat_view import write_stream_message, ChatHistoryView
+from core.context_manager import ConversationContextManager
 from models.model_selector import model, init_model
 from prompt.system_prompt import DEFAULT_SYSTEM_PROMPT, DOMAI_ADD_SYSTEM_PROMPT
 from information.button import RAG_CHAT_CLEAR_BUTTON_MESSAGE
@@ -31,6 +33,8 @@ with col1:
         st.session_state.domain_fields = [""]  # 화면에 보이는 입력칸들
     if 'files_uploaded' not in st.session_state:
         st.session_state.files_uploaded = False  # 파일 업로드 완료 상태
+    if 'ingestion_job_ids' not in st.session_state:
+        st.session_state.ingestion_job_ids = []  # 이 세션에서 제출한 문서 수집 작업
 
     
     st.markdown("### 📮 관심 도메인 등록")
@@ -94,22 +98,33 @@ with col1:
             
     st.markdown("---")
 
-    import io
-    import PyPDF2
-    from storage.azure_blob_storage import AzureBlobStorage
+    from core.document_extraction import get_document_extractor, content_digest, DEFAULT_PAGE_SIZE
+    from core.ingestion import get_ingestion_pipeline
 
 
-    storage = AzureBlobStorage()
+    document_extractor = get_document_extractor()
+    ingestion_pipeline = get_ingestion_pipeline()
+
+    if "doc_digests" not in st.session_state:
+        st.session_state.doc_digests = {}
 
 
     doc_file = None
     doc_file_list = []
 
+    def _get_doc_digest(uploaded_file) -> str:
+        # 같은 업로드 파일은 rerun 마다 다시 해시하지 않음
+        file_key = getattr(uploaded_file, "file_id", None) or uploaded_file.name
+        if file_key not in st.session_state.doc_digests:
+            st.session_state.doc_digests[file_key] = content_digest(uploaded_file.getvalue())
+        return st.session_state.doc_digests[file_key]
+
     @st.dialog('문서 미리보기')
     def vote_preview_document(item):
         doc_file = None
         if item and len(item) > 0:
-            doc_file = item[0]
+            # 선택한 파일 간 전환 (이미 본 PDF 는 캐시된 추출 결과 사용)
+            doc_file = st.selectbox("미리볼 파일", item, format_func=lambda f: f.name) if len(item) > 1 else item[0]
 
             if doc_file.type == "text/plain" or doc_file.name.endswith('.txt'):
                 # 텍스트 파일 내용 표시
@@ -123,32 +138,36 @@ with col1:
                 st.markdown(content)
                 
             elif doc_file.type == "application/pdf":
-                # PDF 파일 내용 추출 및 표시
+                # PDF 파일 내용 추출 및 표시 (요청한 페이지만 추출, 내용 해시별 캐시)
                 try:
-                    # PDF 파일을 BytesIO로 변환
-                    pdf_file = io.BytesIO(doc_file.getvalue())
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
+                    digest = _get_doc_digest(doc_file)
+                    page_count = document_extractor.open_pdf(doc_file.getvalue(), digest).page_count
                     
-                    st.write(f"📄 **PDF 정보:** {len(pdf_reader.pages)}페이지")
-                    
-                    # 첫 번째 페이지부터 최대 5페이지까지 텍스트 추출
-                    max_pages = min(5, len(pdf_reader.pages))
+                    st.write(f"📄 **PDF 정보:** {page_count}페이지")
+
+                    page_group_count = max(1, (page_count + DEFAULT_PAGE_SIZE - 1) // DEFAULT_PAGE_SIZE)
+                    page_group = 0
+                    if page_group_count > 1:
+                        page_group = st.selectbox(
+                            "페이지",
+                            range(page_group_count),
+                            format_func=lambda g: f"{g * DEFAULT_PAGE_SIZE + 1} ~ {min(page_count, (g + 1) * DEFAULT_PAGE_SIZE)} 페이지",
+                            key=f"preview_page_group_{digest}",
+                        )
+
+                    result = document_extractor.get_pdf_pages(
+                        doc_file.getvalue(), start=page_group * DEFAULT_PAGE_SIZE, count=DEFAULT_PAGE_SIZE, digest=digest,
+                    )
                     extracted_text = ""
+                    for page in result["pages"]:
+                        extracted_text += f"\n--- 페이지 {page['page']} ---\n"
+                        extracted_text += page["text"] + "\n"
                     
-                    for page_num in range(max_pages):
-                        page = pdf_reader.pages[page_num]
-                        text = page.extract_text()
-                        extracted_text += f"\n--- 페이지 {page_num + 1} ---\n"
-                        extracted_text += text + "\n"
-                    
-                    if extracted_text.strip():
+                    if extracted_text.strip() and any(page["text"].strip() for page in result["pages"]):
                         st.text_area("PDF 내용", extracted_text, height=400)
                     else:
                         st.warning("PDF에서 텍스트를 추출할 수 없습니다. (이미지만 포함된 PDF일 수 있습니다)")
                         
-                    if len(pdf_reader.pages) > 5:
-                        st.info(f"📄 총 {len(pdf_reader.pages)}페이지 중 처음 5페이지만 표시됩니다.")
-                        
                 except Exception as e:
                     st.error(f"PDF 파일을 읽는 중 오류가 발생했습니다: {str(e)}")
                 
@@ -191,14 +210,55 @@ with col1:
             upload_button_clicked = st.button("파일 업로드", use_container_width=True)
             if upload_button_clicked:
                 if len(doc_file_list) > 0:
-                    with st.spinner("파일 업로드 중..."):
-                        for uploaded_file in doc_file_list:
-                            storage.upload_blob_file_from_streamlit(uploaded_file)
-                    st.success(f"{len(doc_file_list)}개의 파일 업로드가 완료되었습니다.")
-                    st.session_state.files_uploaded = True  # 업로드 완료 상태로 변경
+                    # 업로드 → 텍스트 추출 → 청크 분할 → 인덱서 실행 을 백그라운드 작업으로 제출하고 바로 반환
+                    try:
+                        job_id = ingestion_pipeline.submit(doc_file_list)
+                        st.session_state.ingestion_job_ids.append(job_id)
+                        st.toast(f"{len(doc_file_list)}개 파일의 수집 작업을 시작했습니다.", icon="📤")
+                    except RuntimeError as e:
+                        st.toast(str(e), duration="short", icon="🚨")
                 else:
                     st.toast("문서를 업로드해주세요.", duration="short", icon="🚨")
 
+        ingestion_jobs = [job for job in (ingestion_pipeline.get_job(job_id) for job_id in st.session_state.ingestion_job_ids) if job]
+        has_active_job = any(not job["done"] for job in ingestion_jobs)
+
+        # 진행 중인 작업이 있을 때만 1초마다 이 영역만 다시 그림
+        @st.fragment(run_every=1.0 if has_active_job else None)
+        def render_ingestion_jobs():
+            jobs = [job for job in (ingestion_pipeline.get_job(job_id) for job_id in st.session_state.ingestion_job_ids) if job]
+            for job in reversed(jobs[-3:]):
+                if not job["done"]:
+                    st.progress(min(job["progress"], 1.0), text=job["message"] or "수집 대기 중...")
+                    continue
+
+                if job["status"] == "completed":
+                    st.success(job["message"])
+                    st.session_state.files_uploaded = True  # 업로드 완료 상태로 변경
+                else:
+                    st.error(job["message"])
+                for result in job["results"]:
+                    name = result["name"]
+                    upload = result.get("upload") or {}
+                    if result.get("error") or upload.get("error"):
+                        st.caption(f"🚨 {name}: {result.get('error') or upload.get('error')}")
+                    elif upload.get("duplicate_of"):
+                        st.caption(f"⏭️ {name}: '{upload['duplicate_of']}' 와 내용이 같아 업로드를 생략했습니다.")
+                    elif upload.get("skipped"):
+                        st.caption(f"⏭️ {name}: 변경된 내용이 없어 업로드를 생략했습니다.")
+                    elif upload:
+                        chunk_info = f", 청크 {result['chunks']}개" if "chunks" in result else ""
+                        st.caption(f"✅ {name} ({upload['size'] / 1024 / 1024:.1f}MB, {upload['elapsed']:.1f}s{chunk_info})")
+                indexer_result = job.get("indexer_result")
+                if indexer_result and not indexer_result.get("success"):
+                    st.caption(f"🚨 {indexer_result['message']}")
+
+            # 진행 중이던 작업이 끝나면 전체 화면을 다시 그려 polling 을 멈춤
+            if has_active_job and not any(not job["done"] for job in jobs):
+                st.rerun()
+
+        render_ingestion_jobs()
+
     # 인덱서 관리 섹션  
     st.markdown("---")      
 
@@ -217,18 +277,16 @@ with col1:
         # 인덱서 재실행 처리
         if rerun_indexer_button_clicked:
             try:
-                from ai_search.indexer_manager import IndexerManager
-                indexer_manager = IndexerManager()
+                # 실행 요청은 coordinator 가 모아서 한 번만 보냄 (실행 중이면 끝난 뒤 다시 실행)
+                from ai_search.indexer_coordinator import get_indexer_coordinator
+                result = get_indexer_coordinator().request_run()
                 
-                with st.spinner("Updating Document Hub..."):
-                    result = indexer_manager.run_indexer()
-                    
-                    if result["success"]:
-                        st.success(result["message"])
-                        st.toast(result["message"], icon="✅")
-                    else:
-                        st.error(result["message"])
-                        st.toast(result["message"], icon="🚨")
+                if result["success"]:
+                    st.success(result["message"])
+                    st.toast(result["message"], icon="✅")
+                else:
+                    st.error(result["message"])
+                    st.toast(result["message"], icon="🚨")
             except Exception as e:
                 st.error(f"Document Hub 업데이트 중 오류: {e}")
                 st.toast("Document Hub 업데이트 오류가 발생했습니다.", icon="🚨")
@@ -239,14 +297,16 @@ with col1:
         # 인덱서 상태 확인 처리
         if status_button_clicked:
             try:
-                from ai_search.indexer_manager import IndexerManager
-                indexer_manager = IndexerManager()
+                # 캐시된 상태가 오래됐을 때만 Search admin API 조회
+                from ai_search.indexer_coordinator import get_indexer_coordinator
                 
                 with st.spinner("Document Hub 연결 확인 중..."):
-                    result = indexer_manager.get_indexer_status()
+                    result = get_indexer_coordinator().get_status(refresh_if_stale=True)
                     
                     if result["success"]:
                         st.toast(result["message"], icon="✅")
+                        if result["state"] != "idle":
+                            st.info(f"Document Hub 업데이트 상태: {result['state']}")
                         if result["data"]:
                             with st.expander("Indexer Connection Detail", expanded=False):
                                 st.json(result["data"])
@@ -272,12 +332,15 @@ with col2:
     # use_tool = st.sidebar.checkbox("🔧 도구 사용", value=True, help="도구 사용 여부")
     use_tool = True
     temperature = st.sidebar.slider("temperature", 0.0, 1.0, 0.4)
-    tool_calling_manager = st.session_state.get("tool_calling_manager", None)
+    # 토큰 예산 안에서 모델 요청 메시지를 구성 (세션 기록은 그대로 유지)
+    context_manager = ConversationContextManager(model_name=model.base_model_name())
 
     #### 채팅 기록의 초기화
     if 'messages' not in st.session_state:
         st.session_state.messages = []
 
+    chat_history_view = ChatHistoryView("agent_chat_history_view")
+
     #### SYTEM Prompt 초기화
     if st.session_state.messages == []:
         # download_path = "/Users/baegseunghun/Desktop/ktds/edu/AI-Research-Agent/download_files"
@@ -297,6 +360,7 @@ with col2:
         chat_clear_button_clicked = st.button(RAG_CHAT_CLEAR_BUTTON_MESSAGE, use_container_width=True)    
         if chat_clear_button_clicked:
             st.session_state.messages = []
+            chat_history_view.reset()
             st.toast("채팅 초기화되었습니다.")
             st.rerun()
 
@@ -307,82 +371,73 @@ with col2:
 
         
         if use_tool:
-            tool_calling_manager = st.session_state.get("tool_calling_manager", None)
-            if use_tool and not tool_calling_manager:
-                tool_calling_manager = ToolCallingManager(azure_client=model_client, model_name=model.base_model_name())
-                st.session_state["tool_calling_manager"] = tool_calling_manager
+            # 프로세스 전역으로 공유되는 ToolCallingManager (워커당 1회만 생성)
+            tool_calling_manager = get_shared_tool_calling_manager(model_client, model.base_model_name())
         tools =[]
         if use_tool:
-            tools = tool_calling_manager.tool_list
+            tools = tool_calling_manager.get_tools()
         
-        # System Prompt에 관심 도메인 추가
+        # System Prompt에 관심 도메인 추가 (세션 기록에 쌓지 않고 요청 컨텍스트에만 한 번 포함)
+        extra_system_prompts = []
         if len(st.session_state.domain_input_list) > 0:
             system_prompt = DOMAI_ADD_SYSTEM_PROMPT.format(domain_list=st.session_state.domain_input_list)
-            messages.append({"role": "system", "content": system_prompt})
+            extra_system_prompts.append(system_prompt)
 
         try:
-            response = model.chat(
+            # 스트리밍 응답: 첫 토큰부터 바로 화면에 표시
+            response_stream = model.chat(
                 tools=tools,
-                messages=messages,
+                messages=context_manager.prepare(messages, extra_system_prompts),
                 temperature=temperature,
+                stream=True,
             )
+            write_stream_message(response_stream)
 
-            if response.choices[0].message.tool_calls:
+            if response_stream.tool_calls:
                 # Tool 호출이 있는 경우 처리
-                # ChatCompletionMessage 객체를 딕셔너리로 변환
-                assistant_message = {
-                    "role": "assistant",
-                    "content": response.choices[0].message.content,
-                    "tool_calls": [
-                        {
-                            "id": tool_call.id,
-                            "type": tool_call.type,
-                            "function": {
-                                "name": tool_call.function.name,
-                                "arguments": tool_call.function.arguments
-                            }
-                        } for tool_call in response.choices[0].message.tool_calls
-                    ]
-                }
+                # 스트림에서 누적된 tool_calls 조각을 assistant 메시지 딕셔너리로 변환
+                assistant_message = response_stream.to_assistant_message()
                 # pprint(f"Assistant Message: {assistant_message}")
                 messages.append(assistant_message)
                 
-                tool_response,tool_response_str = None, None
+                tool_calls = response_stream.tool_calls
+                tool_names = ", ".join(tool_call["function"]["name"] for tool_call in tool_calls)
 
-                for tool_call in response.choices[0].message.tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
-                    print(f"Tool {tool_name} called with arguments: {tool_args}")
-                    
-                    # Tool 실행
-                    with st.spinner(f'Tool {tool_name} is calling...'):
-                        try:
-                            tool_response = tool_calling_manager.execute_tool_call(tool_call, tool_name, tool_args)
-                            tool_response_str = json.dumps(tool_response, default=str, ensure_ascii=False)
-                            # UI에 표시 (expander 사용)
-                            with st.chat_message("assistant"):
-                                with st.expander(f'Tool Calling: {tool_name}', expanded=False):
-                                    st.write(tool_response_str)
-                        except Exception as e:
-                            st.error(f"Tool {tool_name} 실행 중 오류가 발생했습니다: {e}")
+                # Tool 동시 실행 (결과는 tool_call 순서대로 반환)
+                with st.spinner(f'Tool {tool_names} is calling...'):
+                    tool_results = tool_calling_manager.execute_tool_calls(tool_calls)
+
+                for tool_result in tool_results:
+                    tool_name = tool_result.name
+                    print(f"Tool {tool_name} called with arguments: {tool_result.arguments} ({tool_result.elapsed:.2f}s)")
+
+                    tool_response_str = tool_result.content_str
+                    if tool_result.error:
+                        st.error(f"Tool {tool_name} 실행 중 오류가 발생했습니다: {tool_result.error}")
+                    else:
+                        # UI에 표시 (expander 사용)
+                        with st.chat_message("assistant"):
+                            with st.expander(f'Tool Calling: {tool_name}', expanded=False):
+                                st.write(tool_response_str)
                             
                     # Tool 응답을 메시지에 추가
                     tool_message = {
                         "role": "tool",
-                        "tool_call_id": tool_call.id,
+                        "tool_call_id": tool_result.tool_call_id,
                         "name": tool_name,
                         "content": tool_response_str,
                     }
                     messages.append(tool_message)
-                # 최종 응답 생성
-                final_response = model.chat(
-                    messages=messages,
+                # 최종 응답 생성 (스트리밍)
+                final_stream = model.chat(
+                    messages=context_manager.prepare(messages, extra_system_prompts),
                     temperature=temperature,
+                    stream=True,
                 )
-                return final_response.choices[0].message.content
+                return write_stream_message(final_stream)
             else:
                 # Tool 호출이 없는 경우
-                return response.choices[0].message.content
+                return response_stream.content
         except (HttpResponseError, ClientAuthenticationError, ResourceNotFoundError) as e:
             st.error(f"Azure OpenAI API 호출 중 오류가 발생했습니다: {e}")
             return f"오류: {e}" 
@@ -394,7 +449,8 @@ with col2:
     # 앵커: 바로 다음에 나오는 컨테이너 블록만 선택하기 위한 표식
     st.markdown('<div id="chat-anchor"></div>', unsafe_allow_html=True)
 
-    with st.container(border=True, height= 600):
+    chat_container = st.container(border=True, height= 600)
+    with chat_container:
         # 이 컨테이너 블록을 반응형 높이 + 스크롤로 지정
         st.markdown(
             """
@@ -409,33 +465,26 @@ with col2:
             unsafe_allow_html=True
         )
 
-        # 여기 안에 채팅 메시지 렌더링
-        for message in st.session_state.messages:
-            if not message or message.get("role") == "system":
-                continue
-            elif message["role"] == "tool":
-                with st.chat_message("assistant"):
-                    with st.expander(f'Tool Calling: {message.get("name", "unknown")}', expanded=False):
-                        st.write(message["content"])
-            elif message.get("tool_calls"):
-                continue
-            else:
-                st.chat_message(message["role"]).write(message["content"])    
+        # 여기 안에 채팅 메시지 렌더링 (최근 턴만 표시하고, 이전 턴은 "이전 대화 더 보기" 로 펼침)
+        chat_history_view.render(st.session_state.messages)
     # 입력창을 마지막에 (하단 고정)
     if user_input := st.chat_input("메시지를 입력하세요"):
         st.session_state.messages.append({"role": "user","content": user_input})
         
-        with st.spinner("GPT가 응답하는 중..."):
+        # 응답은 채팅 컨테이너 안에서 스트리밍으로 렌더링
+        with chat_container:
+            st.chat_message("user").write(user_input)
             assistant_response = get_azure_openai_client(st.session_state.messages)
         
         st.session_state.messages.append({"role": "assistant", "content": assistant_response})
         st.rerun()
     
-    if not tool_calling_manager and not st.session_state.get("tool_calling_manager", None):
+    # 공유 매니저는 워커당 한 번만 생성되며, 세션에는 동기화 알림 표시 여부만 저장
+    if not st.session_state.get("tool_synced", False):
         with st.spinner("Tool 동기화 중..."):
-            tool_calling_manager = ToolCallingManager(azure_client=model_client, model_name=model.base_model_name())
+            get_shared_tool_calling_manager(model_client, model.base_model_name())
             st.toast("Tool 동기화가 완료되었습니다.", icon="✅")
-            st.session_state["tool_calling_manager"] = tool_calling_manager
+            st.session_state["tool_synced"] = True
 
 
 
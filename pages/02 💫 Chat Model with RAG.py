@@ -2,7 +2,12 @@ import streamlit as st
 from azure.core.exceptions import HttpResponseError, ClientAuthenticationError, ResourceNotFoundError
 from dotenv import load_dotenv
 import json
-from core.tool_calling import ToolCallingManager
+from core.tool_calling import get_shared_tool_calling_manager
+from core.chat_view import write_stream_message, render_citations, ChatHistoryView
+from core.citations import CitationParser
+from core.context_manager import ConversationContextManager
+from ai_search.local_index import get_local_index, format_context_prompt, LOCAL_INDEX_MIN_SCORE, LOCAL_INDEX_TOP_K
+from ai_search.retrieval_cache import get_retrieval_cache, RETRIEVAL_CACHE_ENABLED
 from models.model_selector import model, init_model
 from prompt.system_prompt import DEFAULT_SYSTEM_PROMPT
 from information.button import RAG_CHAT_HELP_BUTTON_MESSAGE, RAG_CHAT_CLEAR_BUTTON_MESSAGE, RAG_CHAT_HELP_DIALOG_MESSAGE
@@ -37,6 +42,7 @@ with col2_2:
     chat_clear_button_clicked = st.button(RAG_CHAT_CLEAR_BUTTON_MESSAGE, use_container_width=True, help="채팅 기록 초기화")
     if chat_clear_button_clicked:
         st.session_state.messages = []
+        ChatHistoryView("rag_chat_history_view").reset()
         st.toast("채팅 초기화되었습니다.")
         st.rerun()
 
@@ -57,6 +63,8 @@ init_model()
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 
+chat_history_view = ChatHistoryView("rag_chat_history_view")
+
 #### SYTEM Prompt 초기화
 if st.session_state.messages == []:
     st.session_state.messages.append({"role": "system", "content": DEFAULT_SYSTEM_PROMPT})
@@ -69,11 +77,13 @@ use_tool = False
 
 model_client = model.client()
 temperature = st.sidebar.slider("temperature", 0.0, 1.0, 0.4)
+use_local_index = st.sidebar.toggle("⚡ 로컬 인덱스 우선 검색", value=False, help="수집된 문서의 로컬 인덱스에서 먼저 검색하고, 관련 문서가 없을 때만 Azure AI Search 로 검색합니다.")
+# 토큰 예산 안에서 모델 요청 메시지를 구성 (세션 기록은 그대로 유지)
+context_manager = ConversationContextManager(model_name=model.base_model_name())
 
-tool_calling_manager = st.session_state.get("tool_calling_manager", None)
+tool_calling_manager = None
 if use_tool:
-    tool_calling_manager = ToolCallingManager(azure_client=model_client, model_name=model.base_model_name())
-    st.session_state["tool_calling_manager"] = tool_calling_manager
+    tool_calling_manager = get_shared_tool_calling_manager(model_client, model.base_model_name())
 
 
     
@@ -82,16 +92,17 @@ if use_tool:
 def get_azure_openai_client(messages):
     tools =[]
     if use_tool:
-        tools = tool_calling_manager.tool_list
+        tools = tool_calling_manager.get_tools()
 
     try:
+        index_name = os.getenv("INDEX_NAME", "aisearch")
         rag_params={
                 "data_sources": [
                     {
                         "type": "azure_search",
                         "parameters": {
                             "endpoint": os.getenv("AZURE_AI_SEARCH_ENDPOINT"),
-                            "index_name": os.getenv("INDEX_NAME", "aisearch"),
+                            "index_name": index_name,
                             "authentication": {
                                 "type": "api_key",
                                 "key": os.getenv("AZURE_AI_SEARCH_API_KEY")
@@ -101,137 +112,108 @@ def get_azure_openai_client(messages):
                 ]
             }
             
-        response = model.chat(
+        # 로컬 인덱스 / 검색 결과 캐시에 관련 청크가 있으면 Azure Search 없이 검색 결과를 프롬프트에 넣어 한 번에 응답
+        extra_system_prompts = []
+        prefetched_citations = None
+        query = next((m["content"] for m in reversed(messages) if m and m.get("role") == "user"), "")
+        if RETRIEVAL_CACHE_ENABLED:
+            prefetched_citations = get_retrieval_cache().get(index_name, messages)
+        if prefetched_citations is None and use_local_index:
+            local_results = [
+                result for result in get_local_index().search(query, top_k=LOCAL_INDEX_TOP_K)
+                if result["score"] >= LOCAL_INDEX_MIN_SCORE
+            ]
+            if local_results:
+                prefetched_citations = local_results
+        if prefetched_citations:
+            extra_system_prompts.append(format_context_prompt(prefetched_citations))
+            rag_params = {}
+
+        # 스트리밍 응답: 첫 토큰부터 바로 화면에 표시 ([docN] 마커는 delta 가 도착할 때마다 수집)
+        citation_parser = CitationParser()
+        response_stream = model.chat(
             tools=tools,
-            messages=messages,
+            messages=context_manager.prepare(messages, extra_system_prompts),
             temperature=temperature,
             extra_body=rag_params,
+            stream=True,
         )
+        response_stream.add_delta_listener(citation_parser.feed)
+        write_stream_message(response_stream)
 
-        final_response = None
+        final_stream = None
 
         # Tool 호출이 있는 경우
-        if response.choices[0].message.tool_calls:
+        if response_stream.tool_calls:
             # Tool 호출이 있는 경우 처리
-            # ChatCompletionMessage 객체를 딕셔너리로 변환
-            assistant_message = {
-                "role": "assistant",
-                "content": response.choices[0].message.content or "",
-                "tool_calls": [
-                    {
-                        "id": tool_call.id,
-                        "type": tool_call.type,
-                        "function": {
-                            "name": tool_call.function.name,
-                            "arguments": tool_call.function.arguments
-                        }
-                    } for tool_call in response.choices[0].message.tool_calls
-                ]
-            }
+            # 스트림에서 누적된 tool_calls 조각을 assistant 메시지 딕셔너리로 변환
+            assistant_message = response_stream.to_assistant_message()
             # pprint(f"Assistant Message: {assistant_message}")
             messages.append(assistant_message)
             
-            tool_response,tool_response_str = None, None
-
-            for tool_call in response.choices[0].message.tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-                print(f"Tool {tool_name} called with arguments: {tool_args}")
-                
-                # Tool 실행
-                tool_response_str = ""
-                with st.spinner(f'Tool {tool_name} is calling...'):
-                    try:
-                        tool_response = tool_calling_manager.execute_tool_call(tool_call, tool_name, tool_args)
-                        tool_response_str = json.dumps(tool_response, default=str, ensure_ascii=False)
-                        # UI에 표시 (expander 사용)
-                        with st.chat_message("assistant"):
-                            with st.expander(f'Tool Calling: {tool_name}', expanded=False):
-                                st.write(tool_response_str)
-                    except Exception as e:
-                        st.error(f"Tool {tool_name} 실행 중 오류가 발생했습니다: {e}")
-                        tool_response_str = json.dumps({"error": str(e)})
+            tool_calls = response_stream.tool_calls
+            tool_names = ", ".join(tool_call["function"]["name"] for tool_call in tool_calls)
+
+            # Tool 동시 실행 (결과는 tool_call 순서대로 반환)
+            with st.spinner(f'Tool {tool_names} is calling...'):
+                tool_results = tool_calling_manager.execute_tool_calls(tool_calls)
+
+            for tool_result in tool_results:
+                tool_name = tool_result.name
+                print(f"Tool {tool_name} called with arguments: {tool_result.arguments} ({tool_result.elapsed:.2f}s)")
+
+                tool_response_str = tool_result.content_str
+                if tool_result.error:
+                    st.error(f"Tool {tool_name} 실행 중 오류가 발생했습니다: {tool_result.error}")
+                else:
+                    # UI에 표시 (expander 사용)
+                    with st.chat_message("assistant"):
+                        with st.expander(f'Tool Calling: {tool_name}', expanded=False):
+                            st.write(tool_response_str)
                                 
                 # Tool 응답을 메시지에 추가
                 tool_message = {
                     "role": "tool",
-                    "tool_call_id": tool_call.id,
+                    "tool_call_id": tool_result.tool_call_id,
                     "content": tool_response_str,
                 }
                 messages.append(tool_message)
-            # 최종 응답 생성
-            final_response = model.chat(
-                messages=messages,
+            # 최종 응답 생성 (스트리밍)
+            final_stream = model.chat(
+                messages=context_manager.prepare(messages, extra_system_prompts),
                 temperature=temperature,
                 extra_body=rag_params,
+                stream=True,
             )
+            final_stream.add_delta_listener(citation_parser.feed)
+            write_stream_message(final_stream)
 
         # Tool 호출이 없는 경우
         else:
-            final_response = response
+            final_stream = response_stream
         
-        # 참고한 청크(citations) 표시 (메시지 내 마커 [docN] 기반 필터링)
-        try:
-            import re
-            msg = final_response.choices[0].message
-            ctx = getattr(msg, "context", None)
-            content_text = msg.content or ""
-            doc_markers = set(int(m) for m in re.findall(r"\[doc(\d+)\]", content_text))
-            if isinstance(ctx, dict):
-                all_citations = ctx.get("citations", []) or []
-                # [docN] 마커가 있으면 해당 인덱스만(1-based) 필터링, 없으면 전체 노출(혹은 상위 3개 등)
-                if doc_markers:
-                    citations = [c for i, c in enumerate(all_citations, start=1) if i in doc_markers]
-                else:
-                    citations = all_citations
-                if citations:
-                    with st.chat_message("assistant"):
-                        with st.expander("🔗 참고한 문서/청크", expanded=False):
-                            for idx, cite in enumerate(citations, start=1):
-                                title = cite.get("title") or cite.get("filepath") or f"Citation {idx}"
-                                url = cite.get("url")
-                                filepath = cite.get("filepath")
-                                chunk_id = cite.get("chunk_id")
-                                # 표시용 파일명 (filepath가 있으면 basename 사용)
-                                try:
-                                    filename = os.path.basename(filepath) if filepath else title
-                                except Exception:
-                                    filename = title
-                                content = cite.get("content", "")
-                                if content:
-                                    exp_title = f"Document - {filename}" if chunk_id is not None else f"미리보기 - {filename}"
-                                    with st.expander(exp_title, expanded=False):
-                                        st.text(content.replace("\n", " "))
-        except Exception:
-            pass
-
-        return final_response.choices[0].message.content
+        # 참고한 청크(citations): 응답당 한 번만 해석해 메시지에 저장 (rerun 시에는 저장된 결과만 렌더링)
+        ctx = final_stream.context if prefetched_citations is None else {"citations": prefetched_citations}
+        all_citations = (ctx.get("citations") or []) if isinstance(ctx, dict) else []
+        # Azure Search 로 새로 검색한 결과는 다음 같은 질문을 위해 저장
+        if RETRIEVAL_CACHE_ENABLED and prefetched_citations is None:
+            get_retrieval_cache().set(index_name, messages, all_citations)
+        citations = citation_parser.resolve(all_citations)
+        render_citations(citations)
+
+        return {"role": "assistant", "content": final_stream.content, "citations": citations}
 
     except (HttpResponseError, ClientAuthenticationError, ResourceNotFoundError) as e:
         st.error(f"Azure OpenAI API 호출 중 오류가 발생했습니다: {e}")
-        return f"오류: {e}" 
+        return {"role": "assistant", "content": f"오류: {e}"}
     except Exception as e:
         st.error(f"OpenAI API 호출 중 오류가 발생했습니다: {e}")
-        return f"오류: {e}"
+        return {"role": "assistant", "content": f"오류: {e}"}
 
 
 
-#### NOTE: 채팅 메시지 표시 
-for message in st.session_state.messages:
-    if not message:
-        continue
-    elif message["role"] == "system":
-        continue
-    elif message["role"] == "tool":
-        # 툴 호출 결과 표시
-        with st.chat_message("assistant"):
-            with st.expander(f'Tool Calling: {message.get("name", "unknown")}', expanded=False):
-                st.write(message["content"])
-    elif message.get("tool_calls"):
-        # 툴 호출 요청 메시지는 표시하지 않거나 간단히 표시
-        continue
-    else:  # 일반 메시지인 경우
-        st.chat_message(message["role"]).write(message["content"])
+#### NOTE: 채팅 메시지 표시 (최근 턴만 표시하고, 이전 턴은 "이전 대화 더 보기" 로 펼침)
+chat_history_view.render(st.session_state.messages)
 
 
 #### NOTE 사용자 채팅 입력 및 chat message 추가
@@ -240,8 +222,7 @@ if user_input := st.chat_input("메시지를 입력하세요"):
     st.session_state.messages.append({"role": "user","content": user_input})
     st.chat_message("user").markdown(user_input)
 
-    with st.spinner("GPT가 응답하는 중..."):
-        assistant_response = get_azure_openai_client(st.session_state.messages)
-    
-    st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-    st.chat_message("assistant").markdown(assistant_response)
\ No newline at end of file
+    # 응답은 get_azure_openai_client 안에서 스트리밍으로 렌더링됨
+    assistant_message = get_azure_openai_client(st.session_state.messages)
+
+    st.session_state.messages.append(assistant_message)
\ No newline at end of file
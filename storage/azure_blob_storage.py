@@ -1,57 +1,238 @@
 import os
-import io
-from azure.storage.blob import BlobServiceClient
+import base64
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.pipeline.transport import RequestsTransport
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobServiceClient, BlobBlock, ContentSettings
+from storage.parallel_upload import get_stream_size
 # from storage.storage import Storage
 from dotenv import load_dotenv
 
 load_dotenv()
 # Create the BlobServiceClient object
 
+MB = 1024 * 1024
+# 이 크기 이하의 파일은 블록 분할 없이 한 번의 요청으로 업로드
+SINGLE_PUT_THRESHOLD = int(os.getenv("AZURE_BLOB_SINGLE_PUT_THRESHOLD", str(4 * MB)))
+# 파일 하나를 업로드할 때 동시에 전송하는 블록 수 (메모리 사용량 상한 = block_size * max_concurrency)
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("AZURE_BLOB_UPLOAD_MAX_CONCURRENCY", "4"))
+# 동시에 업로드하는 파일 수
+UPLOAD_MAX_PARALLEL_FILES = int(os.getenv("AZURE_BLOB_UPLOAD_MAX_PARALLEL_FILES", "4"))
+MAX_BLOCK_COUNT = 50000
+# 공유 transport 커넥션 풀 크기 (동시 업로드 파일 수 * 파일당 동시 블록 수 이상 권장)
+CONNECTION_POOL_SIZE = int(os.getenv("AZURE_BLOB_CONNECTION_POOL_SIZE", "32"))
+CONNECTION_TIMEOUT = float(os.getenv("AZURE_BLOB_CONNECTION_TIMEOUT", "20"))
+READ_TIMEOUT = float(os.getenv("AZURE_BLOB_READ_TIMEOUT", "120"))
+# Blob Batch API 는 요청당 최대 256개 하위 요청
+BATCH_DELETE_SIZE = 256
+
+# 계정별 BlobServiceClient 를 프로세스 전역으로 공유 (커넥션 풀, TLS 세션 재사용)
+_service_clients: Dict[tuple, BlobServiceClient] = {}
+_service_clients_lock = threading.Lock()
+
+
+def get_shared_blob_service_client(account_url: str, credential: str) -> BlobServiceClient:
+    """커넥션 풀이 조정된 transport 를 사용하는 공유 BlobServiceClient (Azure SDK 클라이언트는 thread-safe)"""
+    client_key = (account_url, credential)
+    with _service_clients_lock:
+        client = _service_clients.get(client_key)
+        if client is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=CONNECTION_POOL_SIZE, pool_maxsize=CONNECTION_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            transport = RequestsTransport(
+                session=session,
+                session_owner=False,
+                connection_timeout=CONNECTION_TIMEOUT,
+                read_timeout=READ_TIMEOUT,
+            )
+            client = BlobServiceClient(account_url=account_url, credential=credential, transport=transport)
+            _service_clients[client_key] = client
+        return client
+
+
+def choose_block_size(file_size: int) -> int:
+    """파일 크기에 따라 블록 크기 결정 (작은 파일은 요청 수를, 큰 파일은 블록 수 제한을 고려)"""
+    if file_size <= 64 * MB:
+        block_size = 2 * MB
+    elif file_size <= 512 * MB:
+        block_size = 8 * MB
+    else:
+        block_size = 32 * MB
+    # Azure Block Blob 은 최대 50,000 블록
+    while file_size / block_size > MAX_BLOCK_COUNT:
+        block_size *= 2
+    return block_size
+
+
 class AzureBlobStorage:
     def __init__(self):
         self.account_url = os.getenv("AZURE_BLOB_STORAGE_ENDPOINT")
         self.blob_access_key = os.getenv("AZURE_BLOB_STORAGE_ACCOUNT_KEY")
         self.container_name = os.getenv("AZURE_BLOB_STORAGE_CONTAINER_NAME")
-        self.blob_service_client = BlobServiceClient(account_url=self.account_url, credential=self.blob_access_key)
+        self.blob_service_client = get_shared_blob_service_client(self.account_url, self.blob_access_key)
+        self.container_client = self.blob_service_client.get_container_client(container=self.container_name)
 
 
     def upload_blob_file(self, file_path: str, file_name: str):
-        container_client = self.blob_service_client.get_container_client(container=self.container_name)
         full_file_path = os.path.join(file_path, file_name)
         with open(file=full_file_path, mode="rb") as data:
-            blob_client = container_client.upload_blob(name=file_name, data=data, overwrite=True)
+            blob_client = self.container_client.upload_blob(name=file_name, data=data, overwrite=True)
 
     def upload_blob_file_from_streamlit(self, uploaded_file) -> str:
-        """Streamlit UploadedFile 객체를 직접 Blob Storage에 업로드 (예전 방식 복원)
+        """Streamlit UploadedFile 객체를 Blob Storage에 스트리밍 업로드
 
         반환: 업로드된 Blob의 URL
         """
         try:
-            container_client = self.blob_service_client.get_container_client(container=self.container_name)
-            blob_name = uploaded_file.name
-
-            # UploadedFile -> bytes (작은 파일) 또는 buffer 기반 업로드
-            data_bytes = uploaded_file.getvalue()
-            blob_client = container_client.get_blob_client(blob=blob_name)
-            blob_client.upload_blob(data=data_bytes, overwrite=True)
-            return blob_client.url
+            result = self.upload_stream(uploaded_file, uploaded_file.name)
+            return result["url"]
         except Exception as e:
             raise e
 
+    def upload_stream(
+        self,
+        file_obj,
+        blob_name: str,
+        block_size: Optional[int] = None,
+        max_concurrency: int = UPLOAD_MAX_CONCURRENCY,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """file-like 객체를 고정 크기 청크로 읽어 블록 단위로 병렬 업로드
+
+        파일 전체를 메모리에 올리지 않고, 동시에 전송 중인 블록(max_concurrency 개)만 메모리에 유지한다.
+
+        Returns:
+            Dict[str, Any]: name, url, size, elapsed(초), throughput_mbps
+        """
+        blob_client = self.container_client.get_blob_client(blob=blob_name)
+        content_settings = ContentSettings(content_type=content_type) if content_type else None
+
+        total_size = get_stream_size(file_obj)
+        file_obj.seek(0)
+        start = time.perf_counter()
+
+        if total_size <= SINGLE_PUT_THRESHOLD:
+            blob_client.upload_blob(
+                data=file_obj, length=total_size, overwrite=True,
+                metadata=metadata, content_settings=content_settings,
+            )
+            if progress_callback:
+                progress_callback(blob_name, total_size, total_size)
+        else:
+            block_size = block_size or choose_block_size(total_size)
+            block_ids: List[str] = []
+            uploaded = 0
+
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+                pending = set()
+                while True:
+                    chunk = file_obj.read(block_size)
+                    if not chunk:
+                        break
+                    block_id = base64.b64encode(f"{len(block_ids):08d}".encode()).decode()
+                    block_ids.append(block_id)
+                    pending.add(executor.submit(self._stage_block, blob_client, block_id, chunk))
+
+                    # 전송 중인 블록 수를 제한하여 메모리 사용량을 block_size * max_concurrency 로 유지
+                    if len(pending) >= max_concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            uploaded += future.result()
+                        if progress_callback:
+                            progress_callback(blob_name, uploaded, total_size)
+
+                for future in pending:
+                    uploaded += future.result()
+                if progress_callback:
+                    progress_callback(blob_name, uploaded, total_size)
+
+            blob_client.commit_block_list(
+                [BlobBlock(block_id=block_id) for block_id in block_ids],
+                metadata=metadata, content_settings=content_settings,
+            )
+
+        elapsed = time.perf_counter() - start
+        return {
+            "name": blob_name,
+            "url": blob_client.url,
+            "size": total_size,
+            "elapsed": elapsed,
+            "throughput_mbps": (total_size / MB) / elapsed if elapsed > 0 else 0.0,
+        }
+
+    @staticmethod
+    def _stage_block(blob_client, block_id: str, chunk: bytes) -> int:
+        blob_client.stage_block(block_id=block_id, data=chunk, length=len(chunk))
+        return len(chunk)
 
     def get_file_url(self, file_path: str, file_name: str) -> str:
         try:
-            blob_service_client = BlobServiceClient(account_url=self.account_url, credential=self.blob_access_key)
-            blob_client = blob_service_client.get_blob_client(container=self.container_name, blob=file_name)
+            blob_client = self.container_client.get_blob_client(blob=file_name)
             return blob_client.url
         except Exception as e:
             raise e
 
+    def download_blob(self, file_name: str, max_concurrency: int = UPLOAD_MAX_CONCURRENCY):
+        """Blob 다운로드 스트림(StorageStreamDownloader) 반환 (readall / chunks / readinto 로 소비)"""
+        return self.container_client.download_blob(blob=file_name, max_concurrency=max_concurrency)
+
+    def get_metadata(self, file_name: str) -> Optional[Dict[str, str]]:
+        """Blob metadata 조회 (없는 Blob 이면 None)"""
+        try:
+            return self.container_client.get_blob_client(blob=file_name).get_blob_properties().metadata
+        except ResourceNotFoundError:
+            return None
+
+    def exists(self, file_name: str) -> bool:
+        return self.container_client.get_blob_client(blob=file_name).exists()
+
     def delete_file(self, file_path: str, file_name: str) -> bool:
         try:
-            blob_service_client = BlobServiceClient(account_url=self.account_url, credential=self.blob_access_key)
-            blob_client = blob_service_client.get_blob_client(container=self.container_name, blob=file_name)
+            blob_client = self.container_client.get_blob_client(blob=file_name)
             blob_client.delete_blob()
             return True
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+    def delete_files(self, file_names: List[str], batch_size: int = BATCH_DELETE_SIZE) -> Dict[str, Any]:
+        """Blob Batch API 로 여러 파일을 삭제 (batch_size 개당 한 번의 요청)
+
+        Returns:
+            Dict[str, Any]: deleted(삭제된 파일 목록), failed(파일명 → status code)
+        """
+        deleted: List[str] = []
+        failed: Dict[str, Any] = {}
+        batch_size = max(1, min(batch_size, BATCH_DELETE_SIZE))
+
+        for start in range(0, len(file_names), batch_size):
+            batch = file_names[start:start + batch_size]
+            responses = self.container_client.delete_blobs(*batch, raise_on_any_failure=False)
+            for file_name, response in zip(batch, responses):
+                if response.status_code in (200, 202, 204):
+                    deleted.append(file_name)
+                else:
+                    failed[file_name] = response.status_code
+        return {"deleted": deleted, "failed": failed}
+
+    def list_files(self, prefix: Optional[str] = None, include_metadata: bool = False) -> List[Dict[str, Any]]:
+        """prefix 로 시작하는 Blob 목록 조회"""
+        include = ["metadata"] if include_metadata else None
+        return [
+            {
+                "name": blob.name,
+                "size": blob.size,
+                "last_modified": blob.last_modified,
+                "content_type": blob.content_settings.content_type if blob.content_settings else None,
+                "metadata": blob.metadata if include_metadata else None,
+            }
+            for blob in self.container_client.list_blobs(name_starts_with=prefix, include=include)
+        ]
@@ -0,0 +1,111 @@
+# 콘텐츠 주소 기반 중복 제거
+# 업로드할 파일의 sha256 을 스트리밍으로 계산하고, 파일명 → digest manifest 를 유지하여
+# 같은 내용의 파일이 다른 이름으로 다시 업로드되거나 변경 없는 파일이 재업로드될 때 전송을 생략한다.
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_MANIFEST_DIR = os.getenv("CONTENT_MANIFEST_DIR", os.path.join(PROJECT_ROOT, ".cache"))
+STORAGE_DEDUP_ENABLED = os.getenv("STORAGE_DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Blob metadata 에 저장하는 digest 키
+DIGEST_METADATA_KEY = "content_sha256"
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_digest(file_stream, chunk_size: int = DIGEST_CHUNK_SIZE) -> tuple:
+    """file-like 객체의 sha256 을 청크 단위로 계산 (계산 후 스트림 위치를 처음으로 되돌림)
+
+    Returns:
+        tuple: (hex digest, size)
+    """
+    file_stream.seek(0)
+    sha256 = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = file_stream.read(chunk_size)
+        if not chunk:
+            break
+        sha256.update(chunk)
+        size += len(chunk)
+    file_stream.seek(0, io.SEEK_SET)
+    return sha256.hexdigest(), size
+
+
+class ContentManifest:
+    """파일명 → {digest, size, updated_at} manifest (JSON 파일, 원자적 쓰기)
+
+    여러 Streamlit 워커 프로세스가 같은 파일을 공유하므로, 파일이 바뀌었으면(mtime) 다시 읽고
+    쓰기 직전에는 항상 최신 내용을 읽어 자기 변경만 반영한 뒤 저장한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._mtime_ns: Optional[int] = None
+
+    def _load(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._entries, self._mtime_ns = {}, None
+            return self._entries
+        if not force and mtime_ns == self._mtime_ns:
+            return self._entries
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = data if isinstance(data, dict) else {}
+        except json.JSONDecodeError:
+            self._entries = {}
+        except Exception as e:
+            print(f"Content manifest 로드 실패: {e}")
+            self._entries = {}
+        self._mtime_ns = mtime_ns
+        return self._entries
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".content_manifest.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._mtime_ns = os.stat(self.path).st_mtime_ns
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"Content manifest 저장 실패: {e}")
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            entry = self._load().get(name)
+        return entry.get("digest") if entry else None
+
+    def names_for_digest(self, digest: str) -> List[str]:
+        with self._lock:
+            return [name for name, entry in self._load().items() if entry.get("digest") == digest]
+
+    def set(self, name: str, digest: str, size: int) -> None:
+        with self._lock:
+            self._load(force=True)[name] = {"digest": digest, "size": size, "updated_at": time.time()}
+            self._save()
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            if self._load(force=True).pop(name, None) is not None:
+                self._save()
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._load())
@@ -0,0 +1,62 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+def get_stream_size(file_obj) -> int:
+    size = getattr(file_obj, "size", None)
+    if isinstance(size, int):
+        return size
+    position = file_obj.tell()
+    file_obj.seek(0, io.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(position)
+    return size
+
+
+def upload_files_in_parallel(
+    files: List[Any],
+    upload_one: Callable[[Any, Callable[[str, int, int], None]], Dict[str, Any]],
+    max_workers: int,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> List[Dict[str, Any]]:
+    """files 의 각 항목을 upload_one(file, on_progress) 로 동시에 업로드
+
+    on_progress(name, uploaded, total) 는 워커 스레드에서 호출되고,
+    progress_callback(uploaded_bytes, total_bytes) 는 호출한 스레드에서만 호출되므로
+    Streamlit 위젯(st.progress 등)을 직접 갱신해도 된다.
+
+    Returns:
+        List[Dict[str, Any]]: 입력 순서대로 파일별 업로드 결과 (실패 시 error 키 포함)
+    """
+    progress: Dict[int, int] = {}
+    progress_lock = threading.Lock()
+    total_size = sum(get_stream_size(f) for f in files)
+
+    def _progress_for(index: int) -> Callable[[str, int, int], None]:
+        def _on_file_progress(_name: str, uploaded: int, _total: int) -> None:
+            with progress_lock:
+                progress[index] = uploaded
+        return _on_file_progress
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(files)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        future_to_index = {
+            executor.submit(upload_one, f, _progress_for(index)): index
+            for index, f in enumerate(files)
+        }
+        pending = set(future_to_index)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = future_to_index[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = {"name": files[index].name, "error": str(e)}
+            if progress_callback:
+                with progress_lock:
+                    uploaded = sum(progress.values())
+                progress_callback(uploaded, total_size)
+    return results
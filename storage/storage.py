@@ -1,99 +1,370 @@
-# from typing import List, Any
-# import os
-# from dotenv import load_dotenv
-# from storage.azure_blob_storage import AzureBlobStorage
-# from abc import ABC, abstractmethod
-# from collections.abc import Generator
-
-# load_dotenv()
-
-
-
-# # Storage 인터페이스 객체 구현
-# # 구현 기능 :
-# #   1. 파일 업로드
-# #   2. 파일 조회
-# #   3. 파일 삭제
-
-
-# """Abstract interface for file storage implementations."""
-# class Storage(ABC):
-#     def __init__(self):
-#         self.storage = None
-#         self.storage_type = os.getenv("STORAGE_TYPE")
-#         if self.storage_type == "AZURE_BLOB":
-#             self.storage = AzureBlobStorage()
-#         # elif self.storage_type == "LOCAL":
-#         #     self.storage = LocalStorageManager()
-#         else:
-#             raise ValueError(f"Invalid storage type: {self.storage_type}")
-
-#     @abstractmethod
-#     def upload_files(self, files: List[Any]) -> List[str]:
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def upload_files_stream(self, filename, file_stream):
-#         """
-#         스트림으로 파일 저장 (추상 메서드)
-#         메모리 효율적인 파일 업로드를 위해 사용
-        
-#         :param filename: 저장할 파일 경로
-#         :param file_stream: 파일 스트림 객체
-#         """
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def get_file_url(self, file_path, file_name: str) -> str:
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def delete_file(self, file_path, file_name: str) -> bool:
-#         raise NotImplementedError
-
-
-
-
-
-# class BaseStorage(ABC):
-#     """
-#     Interface for file storage.
-#     """
-
-#     def __init__(self):
-#         pass
-
-#     @abstractmethod
-#     def save(self, filename, data):
-#         raise NotImplementedError
-        
-#     @abstractmethod
-#     def save_stream(self, filename, file_stream):
-#         """
-#         스트림으로 파일 저장 (추상 메서드)
-#         메모리 효율적인 파일 업로드를 위해 사용
-        
-#         :param filename: 저장할 파일 경로
-#         :param file_stream: 파일 스트림 객체
-#         """
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def load_once(self, filename: str) -> bytes:
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def load_stream(self, filename: str) -> Generator:
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def download(self, filename, target_filepath):
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def exists(self, filename):
-#         raise NotImplementedError
-
-#     @abstractmethod
-#     def delete(self, filename):
-#         raise NotImplementedError
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from storage.content_manifest import (
+    CONTENT_MANIFEST_DIR,
+    DIGEST_METADATA_KEY,
+    STORAGE_DEDUP_ENABLED,
+    ContentManifest,
+    compute_digest,
+)
+from storage.parallel_upload import get_stream_size, upload_files_in_parallel
+
+load_dotenv()
+
+
+# Storage 인터페이스 객체 구현
+# 구현 기능 :
+#   1. 파일 업로드 (bytes / 스트림)
+#   2. 파일 조회 (한 번에 / 청크 스트림 / 로컬 파일로 다운로드)
+#   3. 파일 존재 확인, 삭제
+#   4. 내용(sha256) 기반 중복 업로드 생략
+# 페이지는 BaseStorage 인터페이스에만 의존하고, 실제 저장소는 STORAGE_TYPE 으로 선택한다.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STORAGE_TYPE = os.getenv("STORAGE_TYPE", "AZURE_BLOB")
+LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", os.path.join(PROJECT_ROOT, ".storage"))
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+
+MB = 1024 * 1024
+# 같은 내용의 동시 저장을 직렬화하는 lock 개수 (digest 로 분산, 프로세스 수명 동안 고정)
+_DIGEST_LOCK_STRIPES = 64
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def _upload_result(filename: str, url: str, size: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        "name": filename,
+        "url": url,
+        "size": size,
+        "elapsed": elapsed,
+        "throughput_mbps": (size / MB) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+class BaseStorage(ABC):
+    """
+    Interface for file storage.
+    """
+
+    # save_files 에서 동시에 저장하는 파일 수
+    max_parallel_files: int = 1
+
+    def __init__(self, manifest_path: Optional[str] = None, dedup: bool = STORAGE_DEDUP_ENABLED):
+        self.dedup = dedup
+        self.manifest = ContentManifest(manifest_path) if manifest_path else None
+        # 같은 내용의 파일이 동시에 저장될 때 한 번만 전송되도록 digest 로 고른 lock 사용
+        # (digest 마다 lock 을 만들면 업로드할수록 계속 늘어나므로 고정 개수로 나눔)
+        self._digest_locks: List[threading.Lock] = [threading.Lock() for _ in range(_DIGEST_LOCK_STRIPES)]
+
+    @abstractmethod
+    def save(self, filename: str, data: bytes) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_stream(
+        self,
+        filename: str,
+        file_stream,
+        progress_callback: Optional[ProgressCallback] = None,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        스트림으로 파일 저장 (추상 메서드)
+        메모리 효율적인 파일 업로드를 위해 사용
+
+        :param filename: 저장할 파일 경로
+        :param file_stream: 파일 스트림 객체
+        :return: name, url, size, elapsed(초), throughput_mbps
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_once(self, filename: str) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_stream(self, filename: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Generator:
+        raise NotImplementedError
+
+    @abstractmethod
+    def download(self, filename: str, target_filepath: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, filename: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, filename: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_file_url(self, filename: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_digest(self, filename: str) -> Optional[str]:
+        """저장된 파일의 sha256 (파일이 없거나 digest 를 알 수 없으면 None)"""
+        raise NotImplementedError
+
+    def save_unique(
+        self,
+        filename: str,
+        file_stream,
+        progress_callback: Optional[ProgressCallback] = None,
+        content_type: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """내용이 같은 파일이 이미 저장되어 있으면 전송을 생략하고, 아니면 save_stream 으로 저장
+
+        - 같은 이름, 같은 내용: skipped=True
+        - 다른 이름, 같은 내용: skipped=True, duplicate_of=기존 파일명 (중복 저장 / 재색인 방지)
+
+        Returns:
+            Dict[str, Any]: save_stream 결과 + digest, skipped, duplicate_of
+        """
+        if not self.dedup:
+            return self.save_stream(filename, file_stream, progress_callback=progress_callback, content_type=content_type)
+
+        start = time.perf_counter()
+        digest, size = compute_digest(file_stream)
+        digest_lock = self._digest_locks[int(digest[:8], 16) % len(self._digest_locks)]
+        with digest_lock:
+            return self._save_unique_locked(filename, file_stream, digest, size, start, progress_callback, content_type)
+
+    def _save_unique_locked(self, filename, file_stream, digest, size, start, progress_callback, content_type) -> Dict[str, Any]:
+        duplicate_of = None
+        if self.get_digest(filename) == digest:
+            duplicate_of = filename
+        elif self.manifest is not None:
+            for name in self.manifest.names_for_digest(digest):
+                if name == filename:
+                    continue
+                # manifest 가 실제 저장소와 어긋났으면(삭제/덮어쓰기) 항목을 정리
+                if self.get_digest(name) == digest:
+                    duplicate_of = name
+                    break
+                self.manifest.remove(name)
+
+        if duplicate_of is not None:
+            if progress_callback:
+                progress_callback(filename, size, size)
+            if self.manifest is not None and duplicate_of == filename:
+                self.manifest.set(filename, digest, size)
+            result = _upload_result(filename, self.get_file_url(duplicate_of), size, time.perf_counter() - start)
+            result.update({
+                "digest": digest,
+                "skipped": True,
+                "duplicate_of": None if duplicate_of == filename else duplicate_of,
+            })
+            return result
+
+        result = self.save_stream(
+            filename, file_stream, progress_callback=progress_callback, content_type=content_type,
+            metadata={DIGEST_METADATA_KEY: digest},
+        )
+        if self.manifest is not None:
+            self.manifest.set(filename, digest, size)
+        result.update({"digest": digest, "skipped": False, "duplicate_of": None})
+        return result
+
+    def save_files(
+        self,
+        files: List[Any],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """여러 파일(UploadedFile 등 name 속성이 있는 스트림)을 max_parallel_files 개씩 동시에 저장 (중복 내용은 생략)
+
+        Returns:
+            List[Dict[str, Any]]: 입력 순서대로 파일별 저장 결과 (실패 시 error 키 포함)
+        """
+        return upload_files_in_parallel(
+            files,
+            lambda f, on_progress: self.save_unique(
+                f.name, f, progress_callback=on_progress, content_type=getattr(f, "type", None),
+            ),
+            max_workers=self.max_parallel_files,
+            progress_callback=progress_callback,
+        )
+
+
+class AzureBlobBaseStorage(BaseStorage):
+    """AzureBlobStorage 를 BaseStorage 인터페이스로 감싼 구현"""
+
+    def __init__(self):
+        from storage.azure_blob_storage import AzureBlobStorage, UPLOAD_MAX_PARALLEL_FILES
+
+        self.storage = AzureBlobStorage()
+        self.max_parallel_files = UPLOAD_MAX_PARALLEL_FILES
+        super().__init__(manifest_path=os.path.join(CONTENT_MANIFEST_DIR, f"content_manifest.azure_blob.{self.storage.container_name}.json"))
+
+    def save(self, filename: str, data: bytes) -> Dict[str, Any]:
+        return self.storage.upload_stream(io.BytesIO(data), filename)
+
+    def save_stream(self, filename, file_stream, progress_callback=None, content_type=None, metadata=None) -> Dict[str, Any]:
+        return self.storage.upload_stream(
+            file_stream, filename, progress_callback=progress_callback, content_type=content_type, metadata=metadata,
+        )
+
+    def load_once(self, filename: str) -> bytes:
+        return self.storage.download_blob(filename).readall()
+
+    def load_stream(self, filename: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Generator:
+        # Blob 다운로드 청크 크기는 SDK 설정(max_chunk_get_size)을 따른다
+        yield from self.storage.download_blob(filename).chunks()
+
+    def download(self, filename: str, target_filepath: str) -> None:
+        with open(target_filepath, "wb") as f:
+            self.storage.download_blob(filename).readinto(f)
+
+    def exists(self, filename: str) -> bool:
+        return self.storage.exists(filename)
+
+    def delete(self, filename: str) -> bool:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        if self.manifest is not None:
+            self.manifest.remove(filename)
+        try:
+            return self.storage.delete_file("", filename)
+        except ResourceNotFoundError:
+            return False
+
+    def get_file_url(self, filename: str) -> str:
+        return self.storage.get_file_url("", filename)
+
+    def get_digest(self, filename: str) -> Optional[str]:
+        # 업로드 시 Blob metadata 에 기록한 digest 를 HEAD 요청 한 번으로 조회
+        metadata = self.storage.get_metadata(filename)
+        return (metadata or {}).get(DIGEST_METADATA_KEY)
+
+
+class LocalStorage(BaseStorage):
+    """로컬 파일시스템 저장소 (개발 / CI / 벤치마크용)
+
+    - 저장: 같은 디렉터리의 임시 파일에 쓴 뒤 os.replace 로 교체 (원자적 쓰기)
+    - load_once: mmap 으로 한 번에 읽기
+    - load_stream: chunk_size 단위 제너레이터
+    """
+
+    def __init__(self, root: str = LOCAL_STORAGE_PATH):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        root_id = hashlib.sha256(self.root.encode("utf-8")).hexdigest()[:12]
+        super().__init__(manifest_path=os.path.join(CONTENT_MANIFEST_DIR, f"content_manifest.local.{root_id}.json"))
+
+    def _path(self, filename: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, filename))
+        # root 밖의 경로(../ 등)는 허용하지 않음
+        if os.path.commonpath([self.root, path]) != self.root or path == self.root:
+            raise ValueError(f"Invalid filename: {filename}")
+        return path
+
+    def _atomic_write(self, filename: str, write: Callable[[Any], int]) -> Dict[str, Any]:
+        path = self._path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        start = time.perf_counter()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                size = write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return _upload_result(filename, Path(path).as_uri(), size, time.perf_counter() - start)
+
+    def save(self, filename: str, data: bytes) -> Dict[str, Any]:
+        def _write(f) -> int:
+            f.write(data)
+            return len(data)
+
+        return self._atomic_write(filename, _write)
+
+    def save_stream(self, filename, file_stream, progress_callback=None, content_type=None, metadata=None) -> Dict[str, Any]:
+        total_size = get_stream_size(file_stream)
+        file_stream.seek(0)
+
+        def _write(f) -> int:
+            written = 0
+            while True:
+                chunk = file_stream.read(STORAGE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                written += len(chunk)
+                if progress_callback:
+                    progress_callback(filename, written, total_size)
+            return written
+
+        return self._atomic_write(filename, _write)
+
+    def load_once(self, filename: str) -> bytes:
+        with open(self._path(filename), "rb") as f:
+            # 빈 파일은 mmap 할 수 없음
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[:]
+
+    def load_stream(self, filename: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Generator:
+        with open(self._path(filename), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def download(self, filename: str, target_filepath: str) -> None:
+        shutil.copyfile(self._path(filename), target_filepath)
+
+    def exists(self, filename: str) -> bool:
+        return os.path.isfile(self._path(filename))
+
+    def delete(self, filename: str) -> bool:
+        if self.manifest is not None:
+            self.manifest.remove(filename)
+        try:
+            os.remove(self._path(filename))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_file_url(self, filename: str) -> str:
+        return Path(self._path(filename)).as_uri()
+
+    def get_digest(self, filename: str) -> Optional[str]:
+        # 로컬 파일은 metadata 가 없으므로 직접 해시 (디스크 속도)
+        if not self.exists(filename):
+            return None
+        with open(self._path(filename), "rb") as f:
+            return compute_digest(f)[0]
+
+
+def get_storage(storage_type: Optional[str] = None) -> BaseStorage:
+    """STORAGE_TYPE(AZURE_BLOB / LOCAL)에 맞는 BaseStorage 구현 반환"""
+    storage_type = (storage_type or STORAGE_TYPE).upper()
+    if storage_type == "AZURE_BLOB":
+        return AzureBlobBaseStorage()
+    elif storage_type == "LOCAL":
+        return LocalStorage()
+    else:
+        raise ValueError(f"Invalid storage type: {storage_type}")
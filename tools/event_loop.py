@@ -0,0 +1,91 @@
+# 백그라운드 이벤트 루프 모듈
+# 도구 서브시스템(MCP 세션 풀, 디스패처, 캐시)이 사용하는 단일 이벤트 루프를
+# 전용 스레드에서 실행하고, 동기 코드(Streamlit 스크립트)에서 코루틴을 제출하는 브리지를 제공한다.
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundEventLoop:
+    """전용 데몬 스레드에서 run_forever 로 동작하는 이벤트 루프
+
+    asyncio.run 처럼 호출마다 루프를 생성/종료하지 않으므로
+    루프에 묶인 연결(세션 풀 등)이 Streamlit rerun 사이에도 유지된다.
+    """
+
+    def __init__(self, name: str = "tool-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._started.wait()
+                return
+            self._started.clear()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_forever, name=self.name, daemon=True)
+            self._thread.start()
+        self._started.wait()
+
+    def _run_forever(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if not self.is_running:
+            self.start()
+        return self._loop
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._loop is not None and self._loop.is_running()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """코루틴을 백그라운드 루프에 제출하고 concurrent.futures.Future 반환"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """코루틴을 백그라운드 루프에서 실행하고 결과를 기다림 (동기 → 비동기 브리지)"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("백그라운드 이벤트 루프 스레드 안에서는 run()을 호출할 수 없습니다. await 를 사용하세요.")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._loop is not None and self._loop.is_running():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout=5)
+            self._thread = None
+            self._loop = None
+
+
+_background_loop: Optional[BackgroundEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundEventLoop:
+    """프로세스 전역 백그라운드 이벤트 루프 반환 (최초 호출 시 시작)"""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundEventLoop()
+        _background_loop.start()
+        return _background_loop
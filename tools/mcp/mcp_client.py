@@ -3,9 +3,9 @@ from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Optional, Literal
 from mcp.client.sse import sse_client
-from mcp.client.streamable_http import streamablehttp_client
 from mcp import ClientSession
 from pprint import pprint
+from tools.mcp.mcp_session_pool import McpSessionPool
 
 
 class TransportType(str, Enum):
@@ -49,26 +49,25 @@ class McpClient:
             raise ValueError("mcp_server_info not a McpServerInfo")
         # session initializing
         self.session: Optional[ClientSession] = None
+        # 초기화된 세션을 재사용하기 위한 서버별 세션 풀
+        self.pool = McpSessionPool(name=self.name, url=self.url, headers=self.headers)
 
 
 
     async def async_streamablehttp_call_tool(self, tool_name, tool_args):
-        async with streamablehttp_client(url=self.url) as (read_stream, write_stream, _):
-            async with ClientSession(read_stream, write_stream) as session:
-                # Initialize the connection
-                await session.initialize()
-                # Call a tool (when LLM requests it)
-                result = await session.call_tool(tool_name, arguments=tool_args)
-                return result
+        # 풀에서 초기화된 세션을 꺼내 도구 호출 (연결 오류 시 재연결 후 재시도)
+        return await self.pool.call_tool(tool_name, tool_args)
 
     async def tool_list(self) -> list:
-        async with streamablehttp_client(url=self.url) as (read_stream, write_stream, _):
-            async with ClientSession(read_stream, write_stream) as session:
-                # Initialize the connection
-                await session.initialize()
-                # List available tools
-                tools_result = await session.list_tools()
-                print('------------------------------------')
-                pprint(f"Available tools: {', '.join([t.name for t in tools_result.tools])}")
-                print('------------------------------------')
-                return tools_result
\ No newline at end of file
+        # List available tools
+        tools_result = await self.pool.list_tools()
+        print('------------------------------------')
+        pprint(f"Available tools: {', '.join([t.name for t in tools_result.tools])}")
+        print('------------------------------------')
+        return tools_result
+
+    async def close(self):
+        await self.pool.close()
+
+    def pool_stats(self) -> dict:
+        return self.pool.stats()
\ No newline at end of file
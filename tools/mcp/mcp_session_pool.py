@@ -0,0 +1,254 @@
+# MCP 세션 풀 모듈
+# 서버별로 초기화된 ClientSession을 재사용하여 매 호출마다 발생하는
+# HTTP 연결 + MCP handshake(initialize) 비용을 제거한다.
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+
+DEFAULT_POOL_MAX_SIZE = int(os.getenv("MCP_POOL_MAX_SIZE", "4"))
+DEFAULT_POOL_IDLE_TIMEOUT = float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "300"))
+DEFAULT_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "30"))
+DEFAULT_HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_POOL_HEALTH_CHECK_TIMEOUT", "5"))
+
+
+class PooledSession:
+    """단일 MCP 세션과 그 연결 수명을 관리하는 클래스
+
+    streamablehttp_client / ClientSession 컨텍스트는 진입한 태스크에서 종료해야 하므로
+    전용 소유 태스크가 연결을 열고, close() 요청이 올 때까지 세션을 유지한다.
+    """
+
+    def __init__(self, url: str, headers: Optional[dict] = None):
+        self.url = url
+        self.headers = headers
+        self.session: Optional[ClientSession] = None
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.use_count = 0
+        self._ready: Optional[asyncio.Future] = None
+        self._closed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def open(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._closed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await self._ready
+        except asyncio.CancelledError:
+            # 연결 대기 중 취소되면(타임아웃 등) 소유 태스크도 정리
+            self._closed.set()
+            self._task.cancel()
+            raise
+
+    async def _run(self) -> None:
+        client_kwargs: Dict[str, Any] = {"url": self.url}
+        if self.headers:
+            client_kwargs["headers"] = self.headers
+        try:
+            async with streamablehttp_client(**client_kwargs) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set_result(None)
+                    await self._closed.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.session = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_used_at
+
+    async def ping(self, timeout: float) -> bool:
+        if not self.is_alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self, timeout: float = 5.0) -> None:
+        if self._closed is not None:
+            self._closed.set()
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, timeout=timeout)
+            except Exception:
+                self._task.cancel()
+
+
+class McpSessionPool:
+    """MCP 서버 하나에 대한 세션 풀
+
+    - max_size 개까지 초기화된 세션을 동시에 유지 (초과 요청은 대기)
+    - 일정 시간 사용하지 않은 세션은 ping으로 상태를 확인 후 재사용
+    - 실패한 세션은 폐기하고 재연결
+    - idle_timeout 이 지난 유휴 세션은 제거
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        headers: Optional[dict] = None,
+        max_size: int = DEFAULT_POOL_MAX_SIZE,
+        idle_timeout: float = DEFAULT_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+        health_check_timeout: float = DEFAULT_HEALTH_CHECK_TIMEOUT,
+    ):
+        self.name = name
+        self.url = url
+        self.headers = headers
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+
+        self._idle: List[PooledSession] = []
+        self._in_use = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, int] = {
+            "created": 0,
+            "reused": 0,
+            "evicted": 0,
+            "failed_health_checks": 0,
+            "reconnects": 0,
+            "errors": 0,
+        }
+
+    def _bind_loop(self) -> None:
+        # 세션은 생성된 이벤트 루프에 묶이므로, 루프가 바뀌면 기존 세션은 사용할 수 없다
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._idle = []
+            self._in_use = 0
+            self._semaphore = asyncio.Semaphore(self.max_size)
+            # 루프가 계속 실행되는 경우(백그라운드 루프) 주기적으로 유휴 세션 정리
+            self._reaper_task = asyncio.create_task(self._reap_idle_periodically())
+
+    async def _reap_idle_periodically(self) -> None:
+        interval = max(1.0, self.idle_timeout / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._evict_idle()
+            except Exception as e:
+                print(f"[{self.name}] 유휴 세션 정리 중 오류: {e}")
+
+    async def _evict_idle(self) -> None:
+        expired = [s for s in self._idle if s.idle_seconds() > self.idle_timeout or not s.is_alive]
+        if not expired:
+            return
+        self._idle = [s for s in self._idle if s not in expired]
+        for pooled in expired:
+            self._stats["evicted"] += 1
+            await pooled.close()
+
+    async def _is_healthy(self, pooled: PooledSession) -> bool:
+        if not pooled.is_alive:
+            return False
+        if pooled.idle_seconds() < self.health_check_interval:
+            return True
+        healthy = await pooled.ping(self.health_check_timeout)
+        if not healthy:
+            self._stats["failed_health_checks"] += 1
+        return healthy
+
+    async def _checkout(self) -> PooledSession:
+        await self._evict_idle()
+        while self._idle:
+            # 가장 최근에 사용한 세션부터 재사용 (LIFO)
+            pooled = self._idle.pop()
+            if await self._is_healthy(pooled):
+                self._stats["reused"] += 1
+                return pooled
+            await pooled.close()
+        pooled = PooledSession(self.url, self.headers)
+        await pooled.open()
+        self._stats["created"] += 1
+        return pooled
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[ClientSession]:
+        """초기화된 세션을 풀에서 꺼내 사용하고, 정상 종료 시 풀에 반납"""
+        self._bind_loop()
+        async with self._semaphore:
+            pooled = await self._checkout()
+            self._in_use += 1
+            try:
+                yield pooled.session
+            except BaseException:
+                # 호출 중 오류가 난 세션은 상태를 신뢰할 수 없으므로 폐기
+                await pooled.close()
+                raise
+            else:
+                pooled.last_used_at = time.monotonic()
+                pooled.use_count += 1
+                if pooled.is_alive:
+                    self._idle.append(pooled)
+            finally:
+                self._in_use -= 1
+
+    async def call_tool(self, tool_name: str, tool_args: dict, retries: int = 1) -> Any:
+        """도구 호출. 연결 오류 시 새 세션으로 재연결하여 retries 만큼 재시도"""
+        for attempt in range(retries + 1):
+            try:
+                async with self.acquire() as session:
+                    return await session.call_tool(tool_name, arguments=tool_args)
+            except Exception as e:
+                self._stats["errors"] += 1
+                if attempt >= retries:
+                    raise
+                self._stats["reconnects"] += 1
+                print(f"[{self.name}] MCP 세션 오류, 재연결 시도 ({attempt + 1}/{retries}): {e}")
+
+    async def list_tools(self, retries: int = 1) -> Any:
+        for attempt in range(retries + 1):
+            try:
+                async with self.acquire() as session:
+                    return await session.list_tools()
+            except Exception as e:
+                self._stats["errors"] += 1
+                if attempt >= retries:
+                    raise
+                self._stats["reconnects"] += 1
+                print(f"[{self.name}] MCP 세션 오류, 재연결 시도 ({attempt + 1}/{retries}): {e}")
+
+    async def close(self) -> None:
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await pooled.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 상태 통계"""
+        return {
+            "server": self.name,
+            "url": self.url,
+            "max_size": self.max_size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            **self._stats,
+        }
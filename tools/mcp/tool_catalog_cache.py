@@ -0,0 +1,100 @@
+# MCP Tool Catalog 디스크 캐시
+# convert_mcp_tool_to_openai 로 변환된 OpenAI 형식 도구 목록을 서버별로 디스크에 저장하여
+# 콜드 스타트 시 MCP 서버 네트워크 왕복 없이 도구 목록을 구성할 수 있게 한다.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from tools.mcp.mcp_client import McpClient
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_TOOL_CATALOG_CACHE_PATH = os.getenv(
+    "TOOL_CATALOG_CACHE_PATH", os.path.join(PROJECT_ROOT, ".cache", "tool_catalog.json")
+)
+DEFAULT_TOOL_CATALOG_TTL = float(os.getenv("TOOL_CATALOG_TTL", "3600"))
+
+
+def server_fingerprint(mcp_client: McpClient) -> str:
+    """서버 설정(이름, transport, url, header key)이 바뀌면 캐시가 무효화되도록 하는 fingerprint"""
+    payload = {
+        "name": mcp_client.name,
+        "transport_type": str(mcp_client.transport_type),
+        "url": mcp_client.url,
+        "header_keys": sorted((mcp_client.headers or {}).keys()),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ToolCatalogCache:
+    """서버별 도구 목록을 TTL, fingerprint 와 함께 JSON 파일로 저장하는 캐시"""
+
+    def __init__(self, path: str = DEFAULT_TOOL_CATALOG_CACHE_PATH, ttl: float = DEFAULT_TOOL_CATALOG_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        except Exception as e:
+            print(f"Tool catalog 캐시 로드 실패: {e}")
+            return {}
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        # 임시 파일에 쓴 뒤 교체하여 동시 실행 중인 워커가 깨진 파일을 읽지 않도록 함
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tool_catalog.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, server_name: str, fingerprint: str, allow_stale: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """캐시된 도구 목록 반환. fingerprint 불일치 또는 TTL 만료(allow_stale=False) 시 None"""
+        with self._lock:
+            entry = self._load().get(server_name)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return None
+        if not allow_stale and time.time() - entry.get("cached_at", 0) > self.ttl:
+            return None
+        return entry.get("tools")
+
+    def set(self, server_name: str, fingerprint: str, tools: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            data = self._load()
+            data[server_name] = {
+                "fingerprint": fingerprint,
+                "cached_at": time.time(),
+                "tools": tools,
+            }
+            try:
+                self._save(data)
+            except Exception as e:
+                print(f"Tool catalog 캐시 저장 실패: {e}")
+
+    def invalidate(self, server_name: Optional[str] = None) -> None:
+        with self._lock:
+            data = self._load()
+            if server_name is None:
+                data = {}
+            else:
+                data.pop(server_name, None)
+            try:
+                self._save(data)
+            except Exception as e:
+                print(f"Tool catalog 캐시 삭제 실패: {e}")
@@ -0,0 +1,161 @@
+# 도구 호출 결과 캐시
+# (도구 이름 + 정규화된 인자) 키로 MCP / 내장 도구 결과를 도구별 TTL 동안 재사용하고,
+# 동시에 들어온 동일한 호출은 하나의 in-flight 요청을 공유(request coalescing)한다.
+# 조회 / 저장은 백그라운드 이벤트 루프(tools.event_loop)에서, stats() / invalidate() 는 Streamlit 스크립트
+# 스레드에서도 호출되므로 _entries / _stats 는 threading.Lock 으로 보호한다. (_inflight 는 루프 안에서만 사용)
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+DEFAULT_TOOL_RESULT_TTL = float(os.getenv("TOOL_RESULT_CACHE_TTL", "300"))
+TOOL_RESULT_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_RESULT_CACHE_MAX_ENTRIES", "512"))
+
+# 도구별 TTL(초). 0 이하면 캐시하지 않음
+DEFAULT_TOOL_TTL_POLICY: Dict[str, float] = {
+    "get_current_time": 0,
+}
+
+
+def _load_ttl_policy() -> Dict[str, float]:
+    # TOOL_RESULT_CACHE_POLICY='{"tavily-search": 300, "search_arxiv": 3600}' 형식으로 덮어쓰기
+    policy = dict(DEFAULT_TOOL_TTL_POLICY)
+    raw_policy = os.getenv("TOOL_RESULT_CACHE_POLICY")
+    if raw_policy:
+        try:
+            policy.update({name: float(ttl) for name, ttl in json.loads(raw_policy).items()})
+        except (ValueError, AttributeError) as e:
+            print(f"TOOL_RESULT_CACHE_POLICY 파싱 실패: {e}")
+    return policy
+
+
+def is_cacheable_tool_result(result: Any) -> bool:
+    """오류 응답은 캐시하지 않음 (MCP isError, 내장 도구의 {"error": ...} 응답)"""
+    if getattr(result, "isError", False):
+        return False
+    if isinstance(result, str):
+        try:
+            parsed = json.loads(result)
+        except ValueError:
+            return True
+        return not (isinstance(parsed, dict) and "error" in parsed)
+    return True
+
+
+class ToolResultCache:
+    """도구별 TTL, LRU 크기 제한, 동일 요청 병합을 지원하는 도구 결과 캐시"""
+
+    def __init__(
+        self,
+        default_ttl: float = DEFAULT_TOOL_RESULT_TTL,
+        max_entries: int = TOOL_RESULT_CACHE_MAX_ENTRIES,
+        ttl_policy: Optional[Dict[str, float]] = None,
+    ):
+        self.default_ttl = default_ttl
+        self.max_entries = max(1, max_entries)
+        self.ttl_policy = ttl_policy if ttl_policy is not None else _load_ttl_policy()
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "bypassed": 0,
+            "evictions": 0,
+        }
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttl_policy.get(tool_name, self.default_ttl)
+
+    @staticmethod
+    def make_key(tool_name: str, tool_args: Dict[str, Any]) -> str:
+        canonical_args = json.dumps(tool_args or {}, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return f"{tool_name}:{hashlib.sha256(canonical_args.encode('utf-8')).hexdigest()}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _lookup(self, key: str) -> tuple:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    async def get_or_call(
+        self,
+        tool_name: str,
+        tool_args: Dict[str, Any],
+        call: Callable[[], Awaitable[Any]],
+        is_cacheable: Callable[[Any], bool] = is_cacheable_tool_result,
+    ) -> Any:
+        """캐시 hit 이면 저장된 결과, 동일 요청이 진행 중이면 그 결과를 기다리고, 아니면 call() 실행"""
+        ttl = self.ttl_for(tool_name)
+        if ttl <= 0:
+            self._count("bypassed")
+            return await call()
+
+        key = self.make_key(tool_name, tool_args)
+        found, value = self._lookup(key)
+        if found:
+            self._count("hits")
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count("coalesced")
+        else:
+            self._count("misses")
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+
+            def _on_done(done_task: asyncio.Task) -> None:
+                self._inflight.pop(key, None)
+                if done_task.cancelled() or done_task.exception() is not None:
+                    return
+                result = done_task.result()
+                if is_cacheable(result):
+                    self._store(key, result, ttl)
+
+            task.add_done_callback(_on_done)
+
+        # 한 호출자가 타임아웃으로 취소되어도 공유 중인 요청은 계속 진행
+        return await asyncio.shield(task)
+
+    def invalidate(self, tool_name: Optional[str] = None) -> None:
+        with self._lock:
+            if tool_name is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key.startswith(f"{tool_name}:")]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+            }